@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its total covers the rest of the stack
+    'user_routes.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,14 +81,22 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
+ASGI_APPLICATION = 'backend.asgi.application'
+
+# Serve user_routes with the async views (user_routes/async_views.py). Only
+# useful under an ASGI server, e.g. `uvicorn backend.asgi:application`.
+ASYNC_VIEWS = os.getenv("DJANGO_ASYNC_VIEWS", "false").lower() == "true"
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# DJANGO_DB_PATH points the app at another SQLite file, e.g. the synthetic
+# dataset built by `manage.py loadbench`.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': Path(os.getenv("DJANGO_DB_PATH", BASE_DIR / 'db.sqlite3')),
     }
 }
 
@@ -131,3 +141,62 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Dataset version stamp
+# Bumped by updater_service after it writes new data; in-process caches
+# (e.g. the legislator autocomplete index) rebuild when it changes.
+# Lives next to the SQLite database so the updater and the API share it.
+
+DATASET_VERSION_FILE = Path(os.getenv("DATASET_VERSION_FILE", BASE_DIR / "dataset.version"))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# The "api" cache holds rendered responses from user_routes; entries are keyed
+# on the dataset version, so old ones simply age out after an ingest.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api-responses',
+        'TIMEOUT': int(os.getenv("API_RESPONSE_CACHE_TIMEOUT", 60 * 60 * 24)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv("API_RESPONSE_CACHE_MAX_ENTRIES", 5000)),
+        },
+    },
+}
+
+API_RESPONSE_CACHE = 'api'
+
+
+# Request timing
+# Share of requests (0 to 1) that user_routes.timing.ServerTimingMiddleware
+# times; those get a Server-Timing header and a JSON line on the
+# "user_routes.timing" logger.
+
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", 1.0))
+
+
+# Logging
+# https://docs.djangoproject.com/en/4.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'user_routes.timing': {
+            'handlers': ['console'],
+            'level': os.getenv("SERVER_TIMING_LOG_LEVEL", "INFO"),
+            'propagate': False,
+        },
+    },
+}
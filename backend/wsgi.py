@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# load the autocomplete index now rather than on the first keystroke
+from user_routes.autocomplete import legislator_index  # noqa: E402
+
+legislator_index.warm()
@@ -2,7 +2,7 @@ from django.contrib import admin
 from core.db_models.bill import Bill
 from core.db_models.legislator import Legislator
 from core.db_models.vote import BillVote, VoteCast
-from core.db_models.campaign import Campaign, Donor 
+from core.db_models.campaign import Campaign, Donor, LegislatorFinanceSummary
 
 # Register your models here.
 admin.site.register(Legislator)
@@ -10,4 +10,5 @@ admin.site.register(Bill)
 admin.site.register(BillVote)
 admin.site.register(VoteCast)
 admin.site.register(Campaign)
-admin.site.register(Donor)
\ No newline at end of file
+admin.site.register(Donor)
+admin.site.register(LegislatorFinanceSummary)
\ No newline at end of file
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
+
+
+def _bump_dataset_version(sender, **kwargs):
+    from core.dataset_version import bump_dataset_version
+    bump_dataset_version()
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core.db_models.legislator import Legislator
+
+        # single-row writes (admin, add_legislator_with_bioguide); bulk writes
+        # in updater_service bump the version explicitly
+        post_save.connect(_bump_dataset_version, sender=Legislator, dispatch_uid="legislator_saved")
+        post_delete.connect(_bump_dataset_version, sender=Legislator, dispatch_uid="legislator_deleted")
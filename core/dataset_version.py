@@ -0,0 +1,47 @@
+import os
+import time
+from threading import Lock
+
+from django.conf import settings
+
+# -----------------------------
+# Dataset version stamp
+# -----------------------------
+# The API and updater_service run in different processes, so the version is a
+# small file next to the database rather than anything held in memory.
+# Reading it is one stat() call; the contents are only re-read when the
+# file's mtime changes.
+
+_lock = Lock()
+_cached = (None, "0")  # (mtime_ns, version)
+
+
+def get_dataset_version():
+    global _cached
+    path = settings.DATASET_VERSION_FILE
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return "0"
+
+    if _cached[0] == mtime:
+        return _cached[1]
+
+    with _lock:
+        try:
+            with open(path) as f:
+                version = f.read().strip() or "0"
+        except FileNotFoundError:
+            return "0"
+        _cached = (mtime, version)
+    return version
+
+
+def bump_dataset_version():
+    path = settings.DATASET_VERSION_FILE
+    version = str(time.time_ns())
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, path)
+    return version
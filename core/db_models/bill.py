@@ -25,6 +25,10 @@ class Bill(models.Model):
 
     class Meta:
         unique_together = ("number","type", "congress")
+        indexes = [
+            # keyset order of get_sponsored_legislation
+            models.Index(fields=["-introduction_date", "-id"], name="bill_intro_date_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.number} - {self.title}"
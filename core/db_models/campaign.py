@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Case, Count, F, Max, Sum, Value, When, Window
+from django.db.models.functions import RowNumber
 from django.core.validators import MaxValueValidator, MinValueValidator
 from core.db_models.constants import PARTY_CHOICES, STATE_CHOICES
 from core.db_models.legislator import Legislator
@@ -47,3 +49,131 @@ class Donor(models.Model):
 
     def __str__(self):
         return f"{self.name} - ${self.contribution_receipt_amount}"
+
+
+MONEY_FIELDS = (
+    "other_political_committee_contributions",
+    "individual_itemized_contributions",
+    "individual_unitemized_contributions",
+    "disbursements",
+    "contributions",
+)
+
+
+class LegislatorFinanceSummary(models.Model):
+    """
+    Career finance totals per legislator, maintained by updater_service
+    whenever it writes campaigns or donors (see refresh()).
+    """
+    legislator = models.OneToOneField(Legislator, primary_key=True, on_delete=models.CASCADE)
+
+    # career sums of the matching Campaign columns (missing totals, stored
+    # as -1 on Campaign, are skipped)
+    other_political_committee_contributions = models.FloatField(default=0)
+    individual_itemized_contributions = models.FloatField(default=0)
+    individual_unitemized_contributions = models.FloatField(default=0)
+    disbursements = models.FloatField(default=0)
+    contributions = models.FloatField(default=0)
+
+    latest_cycle = models.IntegerField(null=True, blank=True)
+    campaign_count = models.IntegerField(default=0)
+    donor_count = models.IntegerField(default=0)
+    top_donor_name = models.CharField(max_length=100, blank=True, default="")
+    top_donor_amount = models.FloatField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    REFRESH_BATCH_SIZE = 500
+
+    def __str__(self):
+        return f"{self.legislator_id} finance summary"
+
+    @classmethod
+    def refresh(cls, legislator_ids=None):
+        """
+        Recomputes summaries for the given legislators (all when None) with
+        three aggregate queries and one upsert per batch.
+        """
+        if legislator_ids is None:
+            legislator_ids = Legislator.objects.values_list("bioguide_id", flat=True)
+        legislator_ids = list(dict.fromkeys(legislator_ids))
+
+        for start in range(0, len(legislator_ids), cls.REFRESH_BATCH_SIZE):
+            cls._refresh_batch(legislator_ids[start:start + cls.REFRESH_BATCH_SIZE])
+
+    @classmethod
+    def _refresh_batch(cls, legislator_ids):
+        campaign_totals = {
+            row["legislator_id"]: row
+            for row in (
+                Campaign.objects
+                .filter(legislator_id__in=legislator_ids)
+                .values("legislator_id")
+                .annotate(
+                    campaign_count=Count("id"),
+                    latest_cycle=Max("election_year"),
+                    **{
+                        field: Sum(Case(
+                            When(**{f"{field}__gt": 0}, then=F(field)),
+                            default=Value(0.0),
+                            output_field=models.FloatField(),
+                        ))
+                        for field in MONEY_FIELDS
+                    },
+                )
+            )
+        }
+
+        donor_counts = dict(
+            Donor.objects
+            .filter(campaign__legislator_id__in=legislator_ids)
+            .values("campaign__legislator_id")
+            .annotate(n=Count("id"))
+            .values_list("campaign__legislator_id", "n")
+        )
+
+        top_donors = {
+            legislator_id: (name, amount)
+            for legislator_id, name, amount in (
+                Donor.objects
+                .filter(campaign__legislator_id__in=legislator_ids)
+                .annotate(
+                    legislator_rank=Window(
+                        expression=RowNumber(),
+                        partition_by=F("campaign__legislator_id"),
+                        order_by=(F("contribution_receipt_amount").desc(), F("id").asc()),
+                    )
+                )
+                .filter(legislator_rank=1)
+                .values_list("campaign__legislator_id", "source_name", "contribution_receipt_amount")
+            )
+        }
+
+        summaries = []
+        for legislator_id in legislator_ids:
+            totals = campaign_totals.get(legislator_id, {})
+            top_name, top_amount = top_donors.get(legislator_id, ("", None))
+            summaries.append(cls(
+                legislator_id=legislator_id,
+                latest_cycle=totals.get("latest_cycle"),
+                campaign_count=totals.get("campaign_count", 0),
+                donor_count=donor_counts.get(legislator_id, 0),
+                top_donor_name=top_name,
+                top_donor_amount=top_amount,
+                **{field: totals.get(field) or 0 for field in MONEY_FIELDS},
+            ))
+
+        cls.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=["legislator"],
+            update_fields=[
+                *MONEY_FIELDS,
+                "latest_cycle",
+                "campaign_count",
+                "donor_count",
+                "top_donor_name",
+                "top_donor_amount",
+                "updated_at",
+            ],
+        )
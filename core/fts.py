@@ -0,0 +1,47 @@
+import re
+
+from django.db import connection
+
+# -----------------------------
+# SQLite FTS5 helpers
+# -----------------------------
+
+LEGISLATOR_FTS_TABLE = "core_legislator_fts"
+BILL_FTS_TABLE = "core_bill_fts"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_enabled(conn=None):
+    """FTS5 tables are only created on SQLite (see core/migrations)."""
+    return (conn or connection).vendor == "sqlite"
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall(query or "")
+
+
+def build_match(tokens, prefix=True, operator="OR"):
+    """
+    Builds an FTS5 MATCH expression from user tokens.
+
+    Every token is quoted so user input can never be parsed as FTS syntax,
+    and optionally turned into a prefix query ("sand"* matches Sanders).
+    """
+    suffix = "*" if prefix else ""
+    terms = ['"%s"%s' % (t.replace('"', '""'), suffix) for t in tokens if t]
+    return f" {operator} ".join(terms)
+
+
+def build_phrase_match(phrases):
+    """
+    Builds an FTS5 MATCH expression where each phrase must appear as a whole
+    ("health care" does not match a bill that only mentions "care") and any
+    phrase may match.
+    """
+    terms = []
+    for phrase in phrases:
+        tokens = tokenize(phrase)
+        if tokens:
+            terms.append('"%s"' % " ".join(tokens))
+    return " OR ".join(terms)
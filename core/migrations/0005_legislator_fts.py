@@ -0,0 +1,75 @@
+from django.db import migrations
+
+# FTS5 index over legislator names, kept in sync with core_legislator by
+# triggers so every write path (ORM save, bulk_create, upserts, admin) is covered.
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS core_legislator_fts USING fts5(
+        bioguide_id,
+        first_name,
+        last_name,
+        full_name,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '1 2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_legislator_fts_ai
+    AFTER INSERT ON core_legislator BEGIN
+        INSERT INTO core_legislator_fts (bioguide_id, first_name, last_name, full_name)
+        VALUES (new.bioguide_id, new.first_name, new.last_name, new.full_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_legislator_fts_ad
+    AFTER DELETE ON core_legislator BEGIN
+        DELETE FROM core_legislator_fts
+        WHERE core_legislator_fts MATCH 'bioguide_id:"' || old.bioguide_id || '"'
+          AND bioguide_id = old.bioguide_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_legislator_fts_au
+    AFTER UPDATE OF bioguide_id, first_name, last_name, full_name ON core_legislator BEGIN
+        DELETE FROM core_legislator_fts
+        WHERE core_legislator_fts MATCH 'bioguide_id:"' || old.bioguide_id || '"'
+          AND bioguide_id = old.bioguide_id;
+        INSERT INTO core_legislator_fts (bioguide_id, first_name, last_name, full_name)
+        VALUES (new.bioguide_id, new.first_name, new.last_name, new.full_name);
+    END
+    """,
+    """
+    INSERT INTO core_legislator_fts (bioguide_id, first_name, last_name, full_name)
+    SELECT bioguide_id, first_name, last_name, full_name FROM core_legislator
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS core_legislator_fts_au",
+    "DROP TRIGGER IF EXISTS core_legislator_fts_ad",
+    "DROP TRIGGER IF EXISTS core_legislator_fts_ai",
+    "DROP TABLE IF EXISTS core_legislator_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        # other backends fall back to the icontains search in user_routes.views
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_rename_bioguide_id_campaign_legislator'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE_SQL), _run(DROP_SQL)),
+    ]
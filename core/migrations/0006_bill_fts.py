@@ -0,0 +1,96 @@
+from django.db import migrations
+
+# FTS5 index over bill title, short summary and subjects, keyed by bill id
+# (rowid). Triggers on core_bill and core_billsubject keep it current, so the
+# index is built as updater_service ingests bills and subjects.
+
+_SUBJECTS = (
+    "(SELECT group_concat(political_subject, ' | ') "
+    "FROM core_billsubject WHERE bill_id = {bill_id})"
+)
+
+_REFRESH = """
+    DELETE FROM core_bill_fts WHERE rowid = {bill_id};
+    INSERT INTO core_bill_fts (rowid, title, short_summary, subjects)
+    SELECT id, title, short_summary, %s FROM core_bill WHERE id = {bill_id};
+""" % _SUBJECTS.format(bill_id="core_bill.id")
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS core_bill_fts USING fts5(
+        title,
+        short_summary,
+        subjects,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_bill_fts_ai
+    AFTER INSERT ON core_bill BEGIN
+        INSERT INTO core_bill_fts (rowid, title, short_summary, subjects)
+        VALUES (new.id, new.title, new.short_summary, %s);
+    END
+    """ % _SUBJECTS.format(bill_id="new.id"),
+    """
+    CREATE TRIGGER IF NOT EXISTS core_bill_fts_ad
+    AFTER DELETE ON core_bill BEGIN
+        DELETE FROM core_bill_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_bill_fts_au
+    AFTER UPDATE OF id, title, short_summary ON core_bill BEGIN
+        DELETE FROM core_bill_fts WHERE rowid = old.id;
+        INSERT INTO core_bill_fts (rowid, title, short_summary, subjects)
+        VALUES (new.id, new.title, new.short_summary, %s);
+    END
+    """ % _SUBJECTS.format(bill_id="new.id"),
+    """
+    CREATE TRIGGER IF NOT EXISTS core_billsubject_fts_ai
+    AFTER INSERT ON core_billsubject BEGIN %s END
+    """ % _REFRESH.format(bill_id="new.bill_id"),
+    """
+    CREATE TRIGGER IF NOT EXISTS core_billsubject_fts_ad
+    AFTER DELETE ON core_billsubject BEGIN %s END
+    """ % _REFRESH.format(bill_id="old.bill_id"),
+    """
+    CREATE TRIGGER IF NOT EXISTS core_billsubject_fts_au
+    AFTER UPDATE ON core_billsubject BEGIN %s %s END
+    """ % (_REFRESH.format(bill_id="old.bill_id"), _REFRESH.format(bill_id="new.bill_id")),
+    """
+    INSERT INTO core_bill_fts (rowid, title, short_summary, subjects)
+    SELECT id, title, short_summary, %s FROM core_bill
+    """ % _SUBJECTS.format(bill_id="core_bill.id"),
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS core_billsubject_fts_au",
+    "DROP TRIGGER IF EXISTS core_billsubject_fts_ad",
+    "DROP TRIGGER IF EXISTS core_billsubject_fts_ai",
+    "DROP TRIGGER IF EXISTS core_bill_fts_au",
+    "DROP TRIGGER IF EXISTS core_bill_fts_ad",
+    "DROP TRIGGER IF EXISTS core_bill_fts_ai",
+    "DROP TABLE IF EXISTS core_bill_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        # other backends fall back to icontains filtering in user_routes.views
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_legislator_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE_SQL), _run(DROP_SQL)),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.27 on 2026-10-18 12:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_bill_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LegislatorFinanceSummary',
+            fields=[
+                ('legislator', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='core.legislator')),
+                ('other_political_committee_contributions', models.FloatField(default=0)),
+                ('individual_itemized_contributions', models.FloatField(default=0)),
+                ('individual_unitemized_contributions', models.FloatField(default=0)),
+                ('disbursements', models.FloatField(default=0)),
+                ('contributions', models.FloatField(default=0)),
+                ('latest_cycle', models.IntegerField(blank=True, null=True)),
+                ('campaign_count', models.IntegerField(default=0)),
+                ('donor_count', models.IntegerField(default=0)),
+                ('top_donor_name', models.CharField(blank=True, default='', max_length=100)),
+                ('top_donor_amount', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
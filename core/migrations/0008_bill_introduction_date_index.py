@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-18 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_legislatorfinancesummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['-introduction_date', '-id'], name='bill_intro_date_id_idx'),
+        ),
+    ]
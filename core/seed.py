@@ -0,0 +1,247 @@
+import datetime
+import random
+from itertools import accumulate, islice
+
+from django.db import transaction
+
+from core.db_models.bill import Bill, BillSponsor, BillSubject
+from core.db_models.campaign import MONEY_FIELDS, Campaign, Donor, LegislatorFinanceSummary
+from core.db_models.constants import STATE_CHOICES
+from core.db_models.legislator import Legislator
+
+# -----------------------------
+# Synthetic dataset
+# -----------------------------
+# Fills the core tables with generated rows shaped like what updater_service
+# ingests, at any size, for load benchmarks and tests. Generation is seeded,
+# so the same counts and seed always give the same database. Activity is
+# skewed the way the real data is: a few legislators sponsor most bills and
+# a few campaigns get most of the donations.
+
+DEFAULT_COUNTS = {
+    "legislators": 10_000,
+    "bills": 100_000,
+    "sponsors": 500_000,
+    "subjects": 200_000,
+    "campaigns": 50_000,
+    "donors": 5_000_000,
+}
+
+CHUNK_SIZE = 10_000
+
+FIRST_NAMES = (
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+    "Christopher", "Lisa", "Daniel", "Nancy", "Matthew", "Betty", "Anthony", "Sandra", "Mark", "Margaret",
+    "Donald", "Ashley", "Steven", "Kimberly", "Andrew", "Emily", "Paul", "Donna", "Joshua", "Michelle",
+    "Kenneth", "Carol", "Kevin", "Amanda", "Brian", "Melissa", "George", "Deborah", "Timothy", "Stephanie",
+    "José", "María", "Zoë", "Renée", "André", "Chloé", "Ngozi", "Hiroshi", "Priya", "Mohammed",
+)
+LAST_NAMES = (
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson",
+    "Walker", "Young", "Allen", "King", "Wright", "Scott", "Torres", "Nguyen", "Hill", "Flores",
+    "Green", "Adams", "Nelson", "Baker", "Hall", "Rivera", "Campbell", "Mitchell", "Carter", "Roberts",
+    "Sanders", "Schumer", "McConnell", "Pelosi", "Ocasio-Cortez", "Cruz", "O'Rourke", "Van Hollen", "Ibáñez", "Kim",
+)
+SUBJECTS = (
+    "Health", "Taxation", "Armed Forces and National Security", "Education", "Immigration",
+    "Crime and Law Enforcement", "Energy", "Environmental Protection", "Agriculture and Food",
+    "Transportation and Public Works", "Finance and Financial Sector", "Labor and Employment",
+    "Social Welfare", "Science, Technology, Communications", "Government Operations and Politics",
+    "International Affairs", "Housing and Community Development", "Public Lands and Natural Resources",
+    "Economics and Public Finance", "Civil Rights and Liberties, Minority Issues",
+)
+TITLE_WORDS = (
+    "health", "care", "tax", "relief", "veterans", "border", "security", "energy", "clean", "water",
+    "education", "student", "loan", "housing", "affordable", "rural", "broadband", "infrastructure",
+    "small", "business", "farm", "workers", "child", "family", "climate", "innovation", "privacy",
+    "data", "defense", "prescription", "drug", "pricing", "election", "integrity", "transparency",
+)
+BILL_TYPES = ("hr", "s", "hres", "sres", "hjres", "sjres", "hconres", "sconres")
+SPONSOR = "s"
+COSPONSOR = "c"
+DONOR_ENTITY_TYPES = ("IND", "IND", "IND", "IND", "PAC", "ORG", "COM", "PTY")
+FIRST_CONGRESS = 110
+LAST_CONGRESS = 119
+
+
+def scaled_counts(scale=1.0, **overrides):
+    """DEFAULT_COUNTS times scale (at least one of each), with explicit overrides."""
+    counts = {name: max(1, int(n * scale)) for name, n in DEFAULT_COUNTS.items()}
+    counts.update({name: n for name, n in overrides.items() if n is not None})
+    return counts
+
+
+def _skewed(rng, n, exponent=0.8):
+    # Zipf-like cumulative weights: a few ids carry most of the activity, in
+    # a random order so that isn't always the first rows
+    weights = [1 / (rank ** exponent) for rank in range(1, n + 1)]
+    rng.shuffle(weights)
+    return list(accumulate(weights))
+
+
+def _congress_start(congress):
+    return datetime.date(1789 + 2 * (congress - 1), 1, 3)
+
+
+def _random_date(rng, start, days):
+    return start + datetime.timedelta(days=rng.randrange(max(days, 1)))
+
+
+def _insert(model, objs, **kwargs):
+    inserted = 0
+    objs = iter(objs)
+    while chunk := list(islice(objs, CHUNK_SIZE)):
+        model.objects.bulk_create(chunk, **kwargs)
+        inserted += len(chunk)
+    return inserted
+
+
+def _legislators(rng, n):
+    states = [code for code, _ in STATE_CHOICES[1:]]
+    parties = ("d", "d", "r", "r", "i", "o", "u")
+    for i in range(n):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        state = rng.choice(states)
+        chamber = "Senate" if rng.random() < 0.2 else "House of Representatives"
+        yield Legislator(
+            bioguide_id=f"{last[0].upper()}{i:06d}",
+            image_link=f"https://www.congress.gov/img/member/{i:06d}.jpg",
+            first_name=first,
+            last_name=last,
+            full_name=f"{first} {last}",
+            current_member=rng.random() < 0.06,
+            birth_year=rng.randint(1930, 1995),
+            current_party=rng.choice(parties),
+            state=state,
+            state_code=state.upper(),
+            district=-1 if chamber == "Senate" else rng.randint(0, 52),
+            current_chamber=chamber,
+        )
+
+
+def _bills(rng, n):
+    for i in range(n):
+        congress = rng.randint(FIRST_CONGRESS, LAST_CONGRESS)
+        introduced = _random_date(rng, _congress_start(congress), 700)
+        words = rng.sample(TITLE_WORDS, rng.randint(3, 7))
+        title = " ".join(words).capitalize() + " Act"
+        yield Bill(
+            congress=congress,
+            # unique per (type, congress) since i is
+            number=str(i // len(BILL_TYPES) + 1),
+            type=BILL_TYPES[i % len(BILL_TYPES)],
+            title=title,
+            update_date=introduced + datetime.timedelta(days=rng.randint(0, 60)),
+            introduction_date=introduced,
+            short_summary=f"To provide for {' and '.join(rng.sample(TITLE_WORDS, 3))}, and for other purposes.",
+            ethics_score=rng.random(),
+        )
+
+
+def _sponsors(rng, bill_ids, legislator_ids, n):
+    # the first sponsor of a bill is the sponsor, the rest cosponsors
+    cum_weights = _skewed(rng, len(legislator_ids))
+    per_bill, extra = divmod(n, len(bill_ids))
+    for i, bill_id in enumerate(bill_ids):
+        k = min(per_bill + (i < extra), len(legislator_ids))
+        chosen = {}
+        while len(chosen) < k:
+            chosen.update(dict.fromkeys(rng.choices(legislator_ids, cum_weights=cum_weights, k=k - len(chosen))))
+        for j, legislator_id in enumerate(chosen):
+            yield BillSponsor(bill_id=bill_id, legislator_id=legislator_id, sponsor_type=SPONSOR if j == 0 else COSPONSOR)
+
+
+def _subjects(rng, bill_ids, n):
+    per_bill, extra = divmod(n, len(bill_ids))
+    for i, bill_id in enumerate(bill_ids):
+        k = min(per_bill + (i < extra), len(SUBJECTS))
+        for subject in rng.sample(SUBJECTS, k):
+            yield BillSubject(bill_id=bill_id, political_subject=subject)
+
+
+def _campaigns(rng, legislator_ids, n):
+    per_legislator, extra = divmod(n, len(legislator_ids))
+    for i, legislator_id in enumerate(legislator_ids):
+        prefix = rng.choice("HS")
+        fec_id = f"{prefix}{i:08d}"
+        for j in range(per_legislator + (i < extra)):
+            raised = rng.lognormvariate(13, 1.2)
+            totals = {
+                "contributions": raised,
+                "disbursements": raised * rng.uniform(0.6, 1.05),
+                "individual_itemized_contributions": raised * rng.uniform(0.3, 0.6),
+                "individual_unitemized_contributions": raised * rng.uniform(0.05, 0.3),
+                "other_political_committee_contributions": raised * rng.uniform(0.0, 0.4),
+            }
+            # some older cycles have no totals upstream (stored as -1)
+            if rng.random() < 0.05:
+                totals = dict.fromkeys(MONEY_FIELDS, -1)
+            yield Campaign(
+                fec_id=fec_id,
+                legislator_id=legislator_id,
+                election_year=2024 - 2 * j,
+                office_full="Senate" if prefix == "S" else "House",
+                **totals,
+            )
+
+
+def _donors(rng, campaigns, n):
+    # campaigns: [(id, election_year, recipient_name)]
+    cum_weights = _skewed(rng, len(campaigns))
+    picks = iter(rng.choices(range(len(campaigns)), cum_weights=cum_weights, k=n))
+    for i, pick in enumerate(picks):
+        campaign_id, election_year, recipient = campaigns[pick]
+        entity_type = rng.choice(DONOR_ENTITY_TYPES)
+        if entity_type == "IND":
+            source = f"{rng.choice(LAST_NAMES).upper()}, {rng.choice(FIRST_NAMES).upper()}"
+        else:
+            source = f"{' '.join(rng.sample(TITLE_WORDS, 2)).upper()} {entity_type} {i % 997}"
+        yield Donor(
+            campaign_id=campaign_id,
+            source_name=source,
+            recipient_name=recipient,
+            entity_type=entity_type,
+            contribution_receipt_amount=round(rng.lognormvariate(5, 1.5), 2),
+            contribution_receipt_date=_random_date(rng, datetime.date(election_year - 1, 1, 1), 730),
+        )
+
+
+def seed_database(counts=None, seed=0, progress=None):
+    """
+    Inserts counts (see DEFAULT_COUNTS) of each kind of row, then refreshes
+    LegislatorFinanceSummary. Expects empty tables. progress, if given, is
+    called as progress(table, rows) after each table.
+    """
+    counts = {**DEFAULT_COUNTS, **(counts or {})}
+    rng = random.Random(seed)
+    report = progress or (lambda table, rows: None)
+
+    with transaction.atomic():
+        report("legislator", _insert(Legislator, _legislators(rng, counts["legislators"])))
+        legislator_ids = list(Legislator.objects.order_by("bioguide_id").values_list("bioguide_id", flat=True))
+
+        report("bill", _insert(Bill, _bills(rng, counts["bills"])))
+        bill_ids = list(Bill.objects.order_by("id").values_list("id", flat=True))
+
+        if bill_ids and legislator_ids:
+            report("bill_sponsor", _insert(BillSponsor, _sponsors(rng, bill_ids, legislator_ids, counts["sponsors"])))
+            report("bill_subject", _insert(BillSubject, _subjects(rng, bill_ids, counts["subjects"])))
+
+        if legislator_ids:
+            report("campaign", _insert(Campaign, _campaigns(rng, legislator_ids, counts["campaigns"])))
+        campaigns = [
+            (campaign_id, year, f"{last.upper()}, {first.upper()}")
+            for campaign_id, year, first, last in Campaign.objects.order_by("id").values_list(
+                "id", "election_year", "legislator__first_name", "legislator__last_name",
+            )
+        ]
+        if campaigns:
+            # generated names can collide within a campaign and date
+            report("donor", _insert(Donor, _donors(rng, campaigns, counts["donors"]), ignore_conflicts=True))
+
+        LegislatorFinanceSummary.refresh(legislator_ids)
+        report("finance_summary", len(legislator_ids))
@@ -1,3 +1,106 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from core.db_models.bill import Bill, BillSponsor, BillSubject
+from core.db_models.campaign import Campaign, Donor, LegislatorFinanceSummary
+from core.db_models.legislator import Legislator
+from core.seed import seed_database
+
+# -----------------------------
+# Performance gates
+# -----------------------------
+
+FIXTURE_COUNTS = {
+    "legislators": 200,
+    "bills": 1_000,
+    "sponsors": 5_000,
+    "subjects": 2_000,
+    "campaigns": 1_000,
+    "donors": 20_000,
+}
+
+# generous, override on slow machines
+REFRESH_CEILING_S = float(os.getenv("PERF_REFRESH_CEILING_S", 5))
+
+
+class DatasetTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # deleting legislators bumps the dataset version; keep the real stamp alone
+        version_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(version_dir.cleanup)
+        override = override_settings(DATASET_VERSION_FILE=Path(version_dir.name) / "dataset.version")
+        override.enable()
+        cls.addClassCleanup(override.disable)
+        super().setUpClass()
+
+
+class SeedTests(DatasetTestCase):
+    COUNTS = {"legislators": 20, "bills": 50, "sponsors": 150, "subjects": 100, "campaigns": 60, "donors": 500}
+
+    def snapshot(self):
+        return (
+            list(Legislator.objects.order_by("bioguide_id").values_list("bioguide_id", "full_name", "current_party")),
+            list(BillSponsor.objects.order_by("bill__number", "bill__type", "legislator").values_list(
+                "bill__number", "bill__type", "legislator", "sponsor_type",
+            )),
+            list(Donor.objects.order_by("campaign__fec_id", "campaign__election_year", "source_name", "contribution_receipt_date")
+                 .values_list("campaign__fec_id", "source_name", "contribution_receipt_amount")),
+        )
+
+    def test_counts(self):
+        seed_database(self.COUNTS)
+        self.assertEqual(Legislator.objects.count(), 20)
+        self.assertEqual(Bill.objects.count(), 50)
+        self.assertEqual(BillSponsor.objects.count(), 150)
+        self.assertEqual(BillSubject.objects.count(), 100)
+        self.assertEqual(Campaign.objects.count(), 60)
+        # colliding donor names are dropped
+        self.assertLessEqual(Donor.objects.count(), 500)
+        self.assertGreater(Donor.objects.count(), 450)
+        self.assertEqual(LegislatorFinanceSummary.objects.count(), 20)
+
+    def test_same_seed_same_data(self):
+        seed_database(self.COUNTS, seed=7)
+        first = self.snapshot()
+        Legislator.objects.all().delete()
+        Bill.objects.all().delete()
+        seed_database(self.COUNTS, seed=7)
+        self.assertEqual(self.snapshot(), first)
+
+
+class FinanceSummaryRefreshTests(DatasetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_database(FIXTURE_COUNTS)
+        cls.bioguide_ids = list(Legislator.objects.order_by("bioguide_id").values_list("bioguide_id", flat=True))
+
+    # batches of at most 50 rows, so each upsert is one statement even
+    # within SQLite's 999 variables per query
+
+    def test_queries_do_not_grow_with_legislators(self):
+        # three aggregates and one upsert, for one legislator or a full batch
+        for n in (1, 10, 50):
+            with self.assertNumQueries(4):
+                LegislatorFinanceSummary.refresh(self.bioguide_ids[:n])
+
+    @mock.patch.object(LegislatorFinanceSummary, "REFRESH_BATCH_SIZE", 50)
+    def test_queries_per_batch(self):
+        with self.assertNumQueries(4 * 4):
+            LegislatorFinanceSummary.refresh(self.bioguide_ids)
+
+    @mock.patch.object(LegislatorFinanceSummary, "REFRESH_BATCH_SIZE", 50)
+    def test_refresh_all(self):
+        # plus the query listing every legislator
+        with self.assertNumQueries(1 + 4 * 4):
+            LegislatorFinanceSummary.refresh()
+
+    def test_refresh_all_under_ceiling(self):
+        start = time.perf_counter()
+        LegislatorFinanceSummary.refresh()
+        self.assertLess(time.perf_counter() - start, REFRESH_CEILING_S)
@@ -1,3 +1,6 @@
 from django.contrib import admin
+from updater_service.models import PopulateCheckpoint, UpdateWatermark
 
-# Register your models here.
\ No newline at end of file
+# Register your models here.
+admin.site.register(UpdateWatermark)
+admin.site.register(PopulateCheckpoint)
@@ -0,0 +1,197 @@
+"""
+Ingest benchmark: run populate stages against a recorded dataset and report
+per-stage costs as JSON, so runs can be compared between commits.
+
+    python benchmark.py recording.sqlite3 --record    # once, needs API keys
+    python benchmark.py recording.sqlite3 --output ingest_benchmark.json
+
+--record runs the stages against the live APIs and saves every response;
+later runs replay that file locally (see replay_server.py) with the same
+stage parameters, so they make exactly the recorded requests. Either way
+the stages write to a throwaway test database, never db.sqlite3, and bump
+a throwaway dataset version stamp, never the live one. For every stage the
+report has upstream HTTP calls, cache hits, retries, seconds spent waiting
+on the rate limiter and in backoff, DB queries issued, rows added per
+table and wall time.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from replay_server import BASE_URL_ENV, Replay, env_for, serve
+
+STAGES = ("legislators", "campaigns", "bills", "donors")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="SQLite file written with UPDATER_RECORD")
+    parser.add_argument("--record", action="store_true", help="run against the live APIs and write the recording")
+    parser.add_argument("--output", default="ingest_benchmark.json")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma separated, in order")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the replay server adds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 429/5xx answers")
+    parser.add_argument(
+        "--pace", action="store_true",
+        help="keep the real per-host rate limits instead of calling the replay as fast as possible",
+    )
+    parser.add_argument("--verbose", action="store_true", help="show the stages' own output")
+    return parser.parse_args()
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise SystemExit(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    # the updater modules read these at import time, so the replay has to
+    # be up and the environment set before Django and they are loaded
+    if args.record:
+        replay = None
+        os.environ["UPDATER_RECORD"] = os.path.abspath(args.recording)
+        os.environ["UPDATER_RESPONSE_CACHE"] = "off"
+    else:
+        replay = Replay(args.recording, latency=args.latency, error_rate=args.error_rate)
+        serve(replay, first_port=0)
+        env = env_for(replay)
+        # a host missing from the recording still must not reach the real
+        # API: its requests get the replay's 404 for unrecorded urls
+        for name, _ in BASE_URL_ENV.values():
+            env.setdefault(name, next(iter(replay.origins.values()), "http://127.0.0.1:9"))
+        if args.pace:
+            env.pop("UPDATER_RATE_LIMITS")
+        os.environ.update(env)
+        os.environ.pop("UPDATER_RECORD", None)
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test import override_settings
+    from django.test.utils import CaptureQueriesContext
+
+    # the stages bump the dataset version after writing; point that at a
+    # scratch file so a benchmark run doesn't invalidate the live API's caches
+    version_dir = tempfile.TemporaryDirectory()
+    version_override = override_settings(DATASET_VERSION_FILE=Path(version_dir.name) / "dataset.version")
+    version_override.enable()
+
+    database_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    import bill_populate
+    import legislater_populate
+    from core.db_models.bill import Bill, BillSponsor, BillSubject
+    from core.db_models.campaign import Campaign, Donor, LegislatorFinanceSummary
+    from core.db_models.legislator import Legislator
+    from utils import RATE_LIMITS, RequestStats
+
+    if replay and args.pace:
+        # replay ports stand in for the real hosts, so give them their limits
+        for origin, local in replay.origins.items():
+            host = origin.split("://", 1)[1]
+            if host in RATE_LIMITS:
+                RATE_LIMITS[local.split("://", 1)[1]] = RATE_LIMITS[host]
+
+    runners = {
+        "legislators": lambda: legislater_populate.populate_legislatures(congress_number=119),
+        "campaigns": legislater_populate.populate_campaigns,
+        "bills": lambda: bill_populate.populate_sponsored_bills(total_pool=500, max_relevant=50),
+        "donors": lambda: legislater_populate.populate_donors(max_donors_per_committee=50, max_donors_per_campaign=50),
+    }
+    tables = {
+        "legislator": Legislator,
+        "campaign": Campaign,
+        "donor": Donor,
+        "bill": Bill,
+        "bill_sponsor": BillSponsor,
+        "bill_subject": BillSubject,
+        "finance_summary": LegislatorFinanceSummary,
+    }
+    clients = [legislater_populate.req, bill_populate.req]
+
+    def row_counts():
+        return {name: model.objects.count() for name, model in tables.items()}
+
+    report = {
+        "revision": _git_revision(),
+        "recording": os.path.abspath(args.recording),
+        "mode": "record" if args.record else "replay",
+        "stages": {},
+    }
+
+    try:
+        for stage in stages:
+            for client in clients:
+                client.stats.reset()
+            before = row_counts()
+
+            output = io.StringIO()
+            redirect = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(output)
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries, redirect:
+                runners[stage]()
+            wall = time.perf_counter() - start
+
+            after = row_counts()
+            result = dict.fromkeys(RequestStats.FIELDS, 0)
+            for client in clients:
+                for field, value in client.stats.snapshot().items():
+                    result[field] += value
+            result["rate_limit_wait_s"] = round(result["rate_limit_wait_s"], 3)
+            result["backoff_wait_s"] = round(result["backoff_wait_s"], 3)
+            result["db_queries"] = len(queries)
+            result["rows_written"] = {
+                name: after[name] - before[name] for name in tables if after[name] != before[name]
+            }
+            result["wall_s"] = round(wall, 3)
+            report["stages"][stage] = result
+
+            print(
+                f"{stage:<12} {wall:8.2f}s  http {result['http_calls']:>6}  "
+                f"queries {result['db_queries']:>6}  rows {sum(result['rows_written'].values()):>7}  "
+                f"rate-limit {result['rate_limit_wait_s']:7.2f}s  backoff {result['backoff_wait_s']:7.2f}s"
+            )
+    finally:
+        connection.creation.destroy_test_db(database_name, verbosity=0)
+        version_override.disable()
+        version_dir.cleanup()
+
+    if replay:
+        report["replay"] = {
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "paced": args.pace,
+            "served": replay.served,
+            "not_recorded": replay.missing,
+            "injected_errors": replay.injected,
+        }
+    report["total_wall_s"] = round(sum(s["wall_s"] for s in report["stages"].values()), 3)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("wrote", args.output)
+
+
+if __name__ == "__main__":
+    main()
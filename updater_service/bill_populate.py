@@ -1,12 +1,14 @@
 import os
 import json
 import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from threading import Lock
+from lxml import etree
 from dotenv import load_dotenv
 import django
 import sys
 from utils import Request
-from legislater_populate import add_legislator_with_bioguide
+from legislater_populate import resolve_legislators
 
 # 1. Make sure Python can find your project modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -24,11 +26,28 @@ django.setup()
 from core.db_models.constants import SPONSOR_TYPE
 from core.db_models.bill import Bill, BillSponsor, BillSubject
 from core.db_models.legislator import Legislator
+from updater_service.models import BILLS, PopulateCheckpoint, UpdateWatermark
+from upsert import upsert_bills
 
 req = Request()
 
 API_KEY = os.getenv("NEXT_PUBLIC_CONGRESS_API_KEY")
-BASE_URL = "https://api.congress.gov/v3"
+BASE_URL = os.getenv("UPDATER_CONGRESS_BASE_URL", "https://api.congress.gov/v3")
+
+# bills whose details are fetched at once; the per-host token buckets in
+# utils.py still decide how fast requests actually go out
+BILL_WORKERS = int(os.getenv("UPDATER_BILL_WORKERS", 8))
+# fetched bills saved per round of bulk_creates
+WRITE_BATCH_SIZE = 100
+
+# bill text documents are read in chunks of this size, and only until the
+# first <official-title> has been parsed
+TEXT_CHUNK_SIZE = 4 * 1024
+# response cache "Accept" key the extracted title is stored under
+OFFICIAL_TITLE = "official-title"
+
+text_stats = {"documents": 0, "cached": 0, "bytes_downloaded": 0, "bytes_needed": 0, "bytes_total": 0}
+_text_stats_lock = Lock()
 
 
 # -------------------------------------------------------------------
@@ -36,41 +55,60 @@ BASE_URL = "https://api.congress.gov/v3"
 # -------------------------------------------------------------------
 
 
-def get_all_bills(congress_number=None, start_date=None, offset=0, limit=10):
-    if not congress_number and not start_date:
-        raise ValueError("congress_number or start_date required")
+def get_all_bills(congress_number=None, start_date=None, offset=0, limit=10, from_date_time=None):
+    if not congress_number and not start_date and not from_date_time:
+        raise ValueError("congress_number, start_date or from_date_time required")
 
     url = f"{BASE_URL}/bill?offset={offset}&limit={limit}&api_key={API_KEY}"
     if congress_number:
         url += f"&congress={congress_number}"
     if start_date:
         url += f"&introducedDate={start_date}"
+    if from_date_time:
+        url += f"&fromDateTime={from_date_time}&sort=updateDate+asc"
 
     data = req.safe_request(url)
     return data.get("bills", []), data.get("pagination", {}).get("count", 0)
 
 
-def get_bill_info(congress, bill_type, number):
+def get_bill_info(congress, bill_type, number, revalidate=False):
+    """
+    Details, subjects and official title of one bill. With revalidate
+    (bills known to have changed upstream) cached detail, subject and text
+    listings are checked with upstream instead of served until their TTL
+    runs out; a text version's XML never changes once published.
+    """
+    data = get_bill_detail(congress, bill_type, number, revalidate=revalidate)
+    return complete_bill_info(data, revalidate=revalidate)
+
+
+def get_bill_detail(congress, bill_type, number, revalidate=False):
+    """The /bill/{congress}/{type}/{number} object alone; it names the sponsors."""
     url = f"{BASE_URL}/bill/{congress}/{bill_type.lower()}/{number}/?format=json&api_key={API_KEY}"
-    data = req.safe_request(url).get("bill", {})
+    return req.safe_request(url, revalidate=revalidate).get("bill", {})
+
 
+def _sponsor_ids(data):
+    return [s["bioguideId"] for s in data.get("sponsors", []) if s.get("bioguideId")]
+
+
+def complete_bill_info(data, revalidate=False):
+    """bill_info for a bill detail: fetches its subjects and official title."""
     subjects = []
     try:
         if data.get("subjects", {}).get("count", 0) > 0:
             subjects_url = data["subjects"]["url"] + f"&api_key={API_KEY}"
-            subjects = get_subjects(subjects_url)
+            subjects = get_subjects(subjects_url, revalidate=revalidate)
     except Exception:
         pass
 
-    sponsors = [
-        s["bioguideId"] for s in data.get("sponsors", []) if s.get("bioguideId")
-    ]
+    sponsors = _sponsor_ids(data)
 
     short_summary = ""
     try:
         if data.get("textVersions", {}).get("count", 0) > 0:
             short_summary_url = data["textVersions"]["url"] + f"&api_key={API_KEY}"
-            short_summary = get_short_summary(short_summary_url)
+            short_summary = get_short_summary(short_summary_url, revalidate=revalidate)
     except Exception:
         pass
 
@@ -78,11 +116,13 @@ def get_bill_info(congress, bill_type, number):
         "subjects": subjects,
         "short_summary": short_summary,
         "sponsors": sponsors,
+        # not part of /bill listings, only of sponsored-legislation ones
+        "introduced_date": data.get("introducedDate"),
     }
 
 
-def get_subjects(url):
-    data = req.safe_request(url)
+def get_subjects(url, revalidate=False):
+    data = req.safe_request(url, revalidate=revalidate)
     return [
         s.get("name")
         for s in data.get("subjects", {}).get("legislativeSubjects", [])
@@ -90,27 +130,81 @@ def get_subjects(url):
     ]
 
 
-def get_short_summary(url):
-    data = req.safe_request(url)
+def get_short_summary(url, revalidate=False):
+    data = req.safe_request(url, revalidate=revalidate)
     try:
         formatted_url = data["textVersions"][0]["formats"][2]["url"]
-        resp = req.safe_request(formatted_url, headers={"Accept": "application/xml"})
-        soup = BeautifulSoup(resp.text, "xml")
-        tag = soup.find("official-title")
-        return tag.text if tag else ""
+        return get_official_title(formatted_url)
     except Exception:
         return ""
 
 
+def get_official_title(url):
+    """
+    The first <official-title> of a bill text XML document. The body is
+    parsed as it streams in and the connection is dropped once the title
+    is complete, so omnibus bills cost a few KB instead of megabytes. Only
+    the title goes into the response cache.
+    """
+    cached = req.cache.get(url, None, OFFICIAL_TITLE) if req.cache else None
+    if cached:
+        with _text_stats_lock:
+            text_stats["cached"] += 1
+        return cached.content.decode("utf-8")
+
+    parser = etree.XMLPullParser(events=("end",), tag="{*}" + OFFICIAL_TITLE, recover=True)
+    title = None
+    downloaded = needed = 0
+
+    resp = req.stream_request(url, headers={"Accept": "application/xml"})
+    try:
+        for chunk in resp.iter_content(chunk_size=TEXT_CHUNK_SIZE):
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                title = "".join(element.itertext())
+                break
+
+            if title is not None:
+                end = chunk.find(b"</" + OFFICIAL_TITLE.encode())
+                needed = downloaded + (end + len(OFFICIAL_TITLE) + 3 if end != -1 else len(chunk))
+                downloaded += len(chunk)
+                break
+            downloaded += len(chunk)
+    finally:
+        resp.close()
+
+    # Content-Length is only comparable when the body wasn't compressed
+    total = downloaded
+    if title is not None and not resp.headers.get("Content-Encoding"):
+        total = int(resp.headers.get("Content-Length") or downloaded)
+
+    with _text_stats_lock:
+        text_stats["documents"] += 1
+        text_stats["bytes_downloaded"] += downloaded
+        text_stats["bytes_needed"] += needed or downloaded
+        text_stats["bytes_total"] += total
+
+    title = title or ""
+    if req.cache:
+        req.cache.put_value(url, None, OFFICIAL_TITLE, title)
+    return title
+
+
+def print_text_stats():
+    s = text_stats
+    print(
+        "bill text:", s["documents"], "documents streamed,", s["cached"], "titles from cache,",
+        "downloaded", s["bytes_downloaded"], "bytes, needed", s["bytes_needed"],
+        "of", s["bytes_total"], "in full",
+    )
+
+
 # -------------------------------------------------------------------
 # CORE LOGIC (FIXED)
 # -------------------------------------------------------------------
 
-def process_bills(bills, existing_bills, max_relevant=100):
-    bills_to_create = []
-    sponsor_refs = []      # (bill_key, bioguide)
-    bill_subjects = {}     # bill_key -> subjects
-
+def select_bills(bills, existing_bills, max_relevant=100):
+    """Filter a legislator's listing down to the bills worth fetching."""
     VALID_TYPES = {"HR", "S", "HJRES", "SJRES", "HCONRES", "SCONRES"}
 
     # 1️⃣ Filter invalid bills FIRST
@@ -143,25 +237,72 @@ def process_bills(bills, existing_bills, max_relevant=100):
 
     print("valid bills after filtering:", len(valid_bills))
 
-    # 3️⃣ Process only the TOP 100 latest bills
+    # 3️⃣ Keep only bills not already stored or queued (one query per listing)
+    stored = _stored_bill_keys(
+        (bill["congress"], bill["type"], bill["number"]) for bill in valid_bills
+    )
+
+    selected = []
     for bill in valid_bills:
+        key = (bill["congress"], bill["type"], bill["number"])
+        if key in stored:
+            continue
 
-        exists = Bill.objects.filter(
-            congress=bill["congress"],
-            type=bill["type"],
-            number=bill["number"],
-        ).exists()
+        existing_bills.add(key)
+        selected.append(bill)
 
-        if exists:
-            continue
+    return selected
 
-        key = (bill["congress"], bill["type"], bill["number"])
 
-        bill_info = get_bill_info(
-            congress=bill["congress"],
-            bill_type=bill["type"],
-            number=bill["number"],
-        )
+def _bills_for_keys(keys):
+    """Bills matching (congress, type, number) keys, in one query."""
+    keys = set(keys)
+    if not keys:
+        return {}
+    candidates = Bill.objects.filter(
+        congress__in={congress for congress, _, _ in keys},
+        number__in={number for _, _, number in keys},
+    )
+    return {
+        (b.congress, b.type, b.number): b
+        for b in candidates
+        if (b.congress, b.type, b.number) in keys
+    }
+
+
+def _stored_bill_keys(keys):
+    keys = set(keys)
+    if not keys:
+        return set()
+    stored = Bill.objects.filter(
+        congress__in={congress for congress, _, _ in keys},
+        number__in={number for _, _, number in keys},
+    ).values_list("congress", "type", "number")
+    return set(stored) & keys
+
+
+def fetch_bill(bill):
+    # runs on a worker thread: HTTP only, no database access
+    bill_info = get_bill_info(
+        congress=bill["congress"],
+        bill_type=bill["type"],
+        number=bill["number"],
+    )
+    return bill, bill_info
+
+
+def write_bills(fetched, update=False):
+    """
+    Save (bill, bill_info) pairs with one bulk_create per table. With
+    update, bills that are already stored get their title, dates and
+    summary overwritten instead of being skipped.
+    """
+    bills_to_create = []
+    sponsor_refs = []      # (bill_key, bioguide)
+    bill_subjects = {}     # bill_key -> subjects
+
+    for bill, bill_info in fetched:
+        key = (bill["congress"], bill["type"], bill["number"])
 
         bill_subjects[key] = bill_info["subjects"]
 
@@ -171,7 +312,7 @@ def process_bills(bills, existing_bills, max_relevant=100):
             type=bill["type"],
             title=bill["title"],
             update_date=bill.get("latestAction", {}).get("actionDate"),
-            introduction_date=bill["introducedDate"],
+            introduction_date=bill.get("introducedDate") or bill_info.get("introduced_date"),
             short_summary=bill_info["short_summary"],
             ethics_score=1,
         )
@@ -181,29 +322,28 @@ def process_bills(bills, existing_bills, max_relevant=100):
         for bioguide in bill_info["sponsors"]:
             sponsor_refs.append((key, bioguide))
 
-        existing_bills.add(key)
-
     # 4️⃣ Save Bills
     print("bill to add count:", len(bills_to_create))
-    Bill.objects.bulk_create(bills_to_create)
+    if update:
+        upsert_bills(bills_to_create)
+    else:
+        Bill.objects.bulk_create(bills_to_create)
 
     # 5️⃣ Fetch saved Bills
-    saved_bills = {
-        (b.congress, b.type, b.number): b
-        for b in Bill.objects.filter(
-            congress__in={b.congress for b in bills_to_create}
-        )
-    }
+    saved_bills = _bills_for_keys(
+        (b.congress, b.type, b.number) for b in bills_to_create
+    )
 
     # 6️⃣ Build sponsors
+    legislators = resolve_legislators(bioguide for _, bioguide in sponsor_refs)
+
     sponsors = []
     for bill_key, bioguide in sponsor_refs:
         bill = saved_bills.get(bill_key)
-        if not bill:
+        legislator = legislators.get(bioguide)
+        if not bill or not legislator:
             continue
 
-        legislator = add_legislator_with_bioguide(bioguide)
-
         sponsors.append(
             BillSponsor(
                 bill=bill,
@@ -213,7 +353,7 @@ def process_bills(bills, existing_bills, max_relevant=100):
         )
 
     print("sponsors to add:", len(sponsors))
-    BillSponsor.objects.bulk_create(sponsors)
+    BillSponsor.objects.bulk_create(sponsors, ignore_conflicts=True)
 
     print("subjects to add:", len(bill_subjects))
     print("##########################################")
@@ -221,27 +361,37 @@ def process_bills(bills, existing_bills, max_relevant=100):
 
     return bills_to_create
 
+
+def process_bills(bills, existing_bills, max_relevant=100, workers=BILL_WORKERS):
+    selected = select_bills(bills, existing_bills, max_relevant=max_relevant)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        fetched = list(pool.map(fetch_bill, selected))
+
+    return write_bills(fetched)
+
 def add_bill_subjects(bill_subjects):
+    bills = _bills_for_keys(bill_subjects.keys())
+
+    existing = set(
+        BillSubject.objects.filter(bill__in=bills.values()).values_list(
+            "bill_id", "political_subject"
+        )
+    )
+
     subjects_to_create = []
 
-    for (congress, bill_type, number), subjects in bill_subjects.items():
-        bill = Bill.objects.filter(
-            congress=congress,
-            type=bill_type,
-            number=number,
-        ).first()
+    for key, subjects in bill_subjects.items():
+        bill = bills.get(key)
 
         if not bill:
             continue
 
         for subject in subjects:
 
-            exists = BillSubject.objects.filter(
-                bill=bill, political_subject=subject
-            ).exists()
-
-            if exists:
+            if (bill.id, subject) in existing:
                 continue
+            existing.add((bill.id, subject))
 
             subjects_to_create.append(
                 BillSubject(
@@ -257,41 +407,208 @@ def add_bill_subjects(bill_subjects):
 # -------------------------------------------------------------------
 
 
-def populate_sponsored_bills(total_pool=-1, max_relevant=100):
+# checkpoint key of a legislator whose bills are queued but not all written
+QUEUED = "queued:"
+
+
+def _collect(pending, fetched, block=False):
+    # move finished fetches into `fetched` as (bill, bill_info, bioguide_id);
+    # with block, wait for at least one
+    done, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+    for future in done:
+        fetched.append(future.result() + (pending.pop(future),))
+
+
+def _write_batch(fetched, outstanding):
+    """Save a batch, then checkpoint legislators with no bills left to write."""
+    write_bills([(bill, bill_info) for bill, bill_info, _ in fetched])
+
+    finished = []
+    for _, _, bioguide_id in fetched:
+        outstanding[bioguide_id] -= 1
+        if not outstanding[bioguide_id]:
+            finished.append(bioguide_id)
+    PopulateCheckpoint.mark(BILLS, *finished)
+
+
+def _bill_checkpoint_key(bill):
+    return f"{bill['congress']}-{bill['type']}-{bill['number']}"
+
+
+def populate_updated_bills(since, workers=BILL_WORKERS, done=()):
+    """
+    Incremental run: page /bill for bills updated since `since`, fetch
+    each one's detail, and for those that are stored or sponsored by a
+    stored legislator also their subjects and text, upserting them. Bills
+    whose checkpoint key is in `done` are skipped.
+    """
+    limit_per_request = 250
+    VALID_TYPES = {"HR", "S", "HJRES", "SJRES", "HCONRES", "SCONRES"}
+
+    changed = []
+    offset = 0
+    total = 1
+    while offset < total:
+        bills, total = get_all_bills(from_date_time=since, offset=offset, limit=limit_per_request)
+        if not bills:
+            break
+        changed += [
+            b for b in bills
+            if b.get("type") in VALID_TYPES and _bill_checkpoint_key(b) not in done
+        ]
+        offset += limit_per_request
+
+    print("bills updated since", since, ":", len(changed))
+
+    stored = _stored_bill_keys(
+        (bill["congress"], bill["type"], bill["number"]) for bill in changed
+    )
+    known_legislators = set(Legislator.objects.values_list("bioguide_id", flat=True))
+
+    # they changed upstream, so cached copies can't be trusted
+    def fetch_detail(bill):
+        return bill, get_bill_detail(bill["congress"], bill["type"], bill["number"], revalidate=True)
+
+    def complete(item):
+        bill, data = item
+        return bill, complete_bill_info(data, revalidate=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # the sponsor is only known from the detail, so that is all that is
+        # fetched for every changed bill; most of them aren't tracked and
+        # are checkpointed straight away
+        tracked = []
+        skipped = []
+        for bill, data in pool.map(fetch_detail, changed):
+            if (
+                (bill["congress"], bill["type"], bill["number"]) in stored
+                or known_legislators.intersection(_sponsor_ids(data))
+            ):
+                tracked.append((bill, data))
+            else:
+                skipped.append(_bill_checkpoint_key(bill))
+            if len(skipped) >= WRITE_BATCH_SIZE:
+                PopulateCheckpoint.mark(BILLS, *skipped)
+                skipped.clear()
+        PopulateCheckpoint.mark(BILLS, *skipped)
+
+        print("tracked bills among them:", len(tracked))
+
+        # subjects and text only for the ones that are kept
+        batch = []
+        for bill, bill_info in pool.map(complete, tracked):
+            batch.append((bill, bill_info))
+            if len(batch) >= WRITE_BATCH_SIZE:
+                write_bills(batch, update=True)
+                PopulateCheckpoint.mark(BILLS, *(_bill_checkpoint_key(b) for b, _ in batch))
+                batch.clear()
+
+    write_bills(batch, update=True)
+    PopulateCheckpoint.mark(BILLS, *(_bill_checkpoint_key(b) for b, _ in batch))
+
+
+def populate_sponsored_bills(total_pool=-1, max_relevant=100, workers=BILL_WORKERS, incremental=False, resume=False):
+    """
+    Pipeline: the main thread pages each legislator's sponsored bills and
+    queues the selected ones on a pool of `workers` threads, which fetch
+    bill details (info, subjects, text) concurrently. Finished bills come
+    back to the main thread, the only one writing to the database, and are
+    saved in batches of WRITE_BATCH_SIZE while the next listings download.
+
+    With incremental, and once a previous run has recorded a watermark,
+    only bills updated upstream since then are fetched (see
+    populate_updated_bills). With resume, legislators (or, incrementally,
+    bills) checkpointed by the previous run are not fetched again.
+    """
+    done = PopulateCheckpoint.begin(BILLS, resume)
+    if PopulateCheckpoint.FINISHED in done:
+        print("bills already populated in the run being resumed")
+        return
+
+    started = PopulateCheckpoint.started(BILLS)
+    since = UpdateWatermark.current(BILLS) if incremental else None
+    if since:
+        populate_updated_bills(since, workers=workers, done=done)
+        print_text_stats()
+        UpdateWatermark.advance(BILLS, started)
+        PopulateCheckpoint.finish(BILLS)
+        return
+
     limit_per_request = 250
     legislators = Legislator.objects.all()
-    billsToAdd = []
+    # shared across legislators so co-sponsored bills are fetched once
+    existing_bills = set()
+    pending = {}       # future -> bioguide_id
+    fetched = []
+    outstanding = {}   # bioguide_id -> bills queued but not yet written
+    sponsoring = set(BillSponsor.objects.values_list("legislator_id", flat=True).distinct())
 
     print("begun populating bills for", len(legislators), "legislators")
 
-    # get 100 most recent sponsored bills from each legislator
-    for legislator in legislators:
-        existing_bills = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # get 100 most recent sponsored bills from each legislator
+        for legislator in legislators:
+            bioguide_id = legislator.bioguide_id
 
-        #TODO add a feature to turn this on or off im lazy
-        if BillSponsor.objects.filter(legislator=legislator).exists():
-            print("skipping",legislator.full_name)
-            continue
+            if bioguide_id in done:
+                continue
 
+            # legislators the interrupted run got to already have some
+            # sponsors, so they are finished rather than skipped
+            #TODO add a feature to turn this on or off im lazy
+            if bioguide_id in sponsoring and QUEUED + bioguide_id not in done:
+                print("skipping",legislator.full_name)
+                continue
 
-        if total_pool == -1:
-            _, total_pool = get_sponsored_bills(legislator.bioguide_id, 0, 1)
+            pool_size = total_pool
+            if pool_size == -1:
+                _, pool_size = get_sponsored_bills(bioguide_id, 0, 1)
 
-        for offset in range(0, total_pool, limit_per_request):
+            bills = []
+            for offset in range(0, pool_size, limit_per_request):
 
-            limit = (
-                total_pool - offset
-                if total_pool - offset < limit_per_request
-                else limit_per_request
-            )
+                limit = (
+                    pool_size - offset
+                    if pool_size - offset < limit_per_request
+                    else limit_per_request
+                )
+
+                page, _ = get_sponsored_bills(bioguide_id, offset, limit)
+                bills += page
+
+            print("##########################################")
+            print("queueing bills for", legislator.full_name)
+            selected = select_bills(bills, existing_bills, max_relevant=max_relevant)
+            if not selected:
+                PopulateCheckpoint.mark(BILLS, bioguide_id)
+                continue
+
+            PopulateCheckpoint.mark(BILLS, QUEUED + bioguide_id)
+            outstanding[bioguide_id] = len(selected)
+            for bill in selected:
+                pending[pool.submit(fetch_bill, bill)] = bioguide_id
+
+            # don't let listings run too far ahead of the workers
+            _collect(pending, fetched)
+            while len(pending) > workers * 4:
+                _collect(pending, fetched, block=True)
+
+            if len(fetched) >= WRITE_BATCH_SIZE:
+                _write_batch(fetched, outstanding)
+                fetched = []
+
+        while pending:
+            _collect(pending, fetched, block=True)
+            if len(fetched) >= WRITE_BATCH_SIZE:
+                _write_batch(fetched, outstanding)
+                fetched = []
 
-            bills, _ = get_sponsored_bills(legislator.bioguide_id, offset, limit)
-            billsToAdd += bills
+    if fetched:
+        _write_batch(fetched, outstanding)
 
-        # add the 100 bills to the database
-        print("##########################################")
-        print("adding bills for", legislator.full_name, end="")
-        process_bills(billsToAdd, existing_bills, max_relevant=max_relevant)
+    print_text_stats()
+    UpdateWatermark.advance(BILLS, started)
+    PopulateCheckpoint.finish(BILLS)
 
 
 def get_sponsored_bills(bioguide_id, offset=0, limit=10):
@@ -4,8 +4,9 @@ import django
 import sys
 from constants import FEC_STATE_NAMES_TO_CODES
 from urllib.parse import quote_plus
-from utils import Request
+from utils import AsyncRequest, Request
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # 1. Make sure Python can find your project modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -22,18 +23,31 @@ load_dotenv()
 django.setup()
 
 from core.db_models.legislator import Legislator
-from core.db_models.campaign import Campaign, Donor
+from core.db_models.campaign import Campaign, Donor, LegislatorFinanceSummary
+from core.dataset_version import bump_dataset_version
+from updater_service.models import (
+    CAMPAIGNS,
+    DONORS,
+    LEGISLATORS,
+    PopulateCheckpoint,
+    UpdateWatermark,
+)
+from upsert import upsert_campaigns, upsert_legislators
 
 req = Request()
 
 CONGRESS_API_KEY = os.getenv("NEXT_PUBLIC_CONGRESS_API_KEY")
 FEC_API_KEY = os.getenv("NEXT_PUBLIC_OPEN_FEC_API_KEY")
-CONGRESS_BASE_URL = "https://api.congress.gov/v3"
-FEC_BASE_URL = "https://api.open.fec.gov/v1"
+# overridable to point the updater at replay_server.py
+CONGRESS_BASE_URL = os.getenv("UPDATER_CONGRESS_BASE_URL", "https://api.congress.gov/v3")
+FEC_BASE_URL = os.getenv("UPDATER_FEC_BASE_URL", "https://api.open.fec.gov/v1")
 
+# committees whose receipts are fetched at once for one campaign
+DONOR_WORKERS = int(os.getenv("UPDATER_DONOR_WORKERS", 4))
 
-def get_all_legislators(congress_number=None, offset=0, limit=1):
-    """Fetch legislators for a given congress number or start date."""
+
+def get_all_legislators(congress_number=None, offset=0, limit=1, from_date_time=None):
+    """Fetch legislators for a given congress number, optionally only those updated since from_date_time."""
     if not congress_number:
         raise ValueError("At least one of congress_number must be provided.")
 
@@ -43,6 +57,8 @@ def get_all_legislators(congress_number=None, offset=0, limit=1):
         "limit": limit,
         "api_key": CONGRESS_API_KEY,
     }
+    if from_date_time:
+        params["fromDateTime"] = from_date_time
 
     data = req.safe_request_params(url=f"{CONGRESS_BASE_URL}/member", params=params)
     legislators = data.get("members", [])
@@ -50,22 +66,15 @@ def get_all_legislators(congress_number=None, offset=0, limit=1):
     return legislators, total
 
 
-def add_legislator_with_bioguide(bioguide_id):
-
-    check = Legislator.objects.filter(bioguide_id=bioguide_id)
-
-    if check.exists():
-        return check.first()
-
-    params = {"api_key": CONGRESS_API_KEY, "format": "json"}
-    l = req.safe_request_params(
-        url=f"{CONGRESS_BASE_URL}/member/{bioguide_id}", params=params
-    ).get("member", {})
+def _date_key(value):
+    # FEC sends "2024-03-31" or "2024-03-31T00:00:00"; the DB gives a date
+    return str(value)[:10]
 
-    key = l.get("bioguideId", "")
 
-    legislator_obj = Legislator(
-        bioguide_id=key,
+def _member_to_legislator(l):
+    # l is the "member" object of /member/{bioguide_id}
+    return Legislator(
+        bioguide_id=l.get("bioguideId", ""),
         image_link=l.get("depiction", {}).get("imageUrl"),
         first_name=l.get("firstName", ""),
         full_name=l.get("directOrderName", ""),
@@ -76,31 +85,101 @@ def add_legislator_with_bioguide(bioguide_id):
             l.get("partyHistory", []), key=lambda x: x.get("startYear", 0), default={}
         ).get("partyName", ""),
         state=l.get("state", ""),
-        state_code=FEC_STATE_NAMES_TO_CODES.get(l.get("state", "")),
+        state_code=FEC_STATE_NAMES_TO_CODES.get(l.get("state", ""), "N/A"),
         current_chamber=max(
             l.get("terms", []), key=lambda x: x.get("startYear", 0), default={}
         ).get("chamber", ""),
         district=l.get("district", -1),
     )
 
-    legislator_obj.save()
 
-    return legislator_obj
+def _fetch_member(bioguide_id):
+    params = {"api_key": CONGRESS_API_KEY, "format": "json"}
+    return req.safe_request_params(
+        url=f"{CONGRESS_BASE_URL}/member/{bioguide_id}", params=params
+    ).get("member", {})
+
+
+# bioguide_id -> Legislator (None when upstream has no such member), kept
+# for the whole run so no id is looked up twice
+_resolved = {}
+
+
+def resolve_legislators(bioguide_ids, workers=4):
+    """
+    Legislators for a batch of bioguide ids, by id. Ids not seen before in
+    this run are looked up in one query; the ones still missing are fetched
+    from /member/{id} on `workers` threads (same rate limit as every other
+    Congress call) and inserted with one bulk upsert.
+    """
+    wanted = {b for b in bioguide_ids if b}
+    unseen = wanted - _resolved.keys()
 
+    if unseen:
+        _resolved.update(Legislator.objects.in_bulk(unseen))
+        missing = sorted(unseen - _resolved.keys())
 
-def populate_donors(max_donors_per_committee=250, max_donors_per_campaign=50):
+        if missing:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                members = list(pool.map(_fetch_member, missing))
+
+            created = {}
+            for bioguide_id, member in zip(missing, members):
+                legislator = _member_to_legislator(member) if member.get("bioguideId") else None
+                _resolved[bioguide_id] = legislator
+                if legislator:
+                    created[legislator.bioguide_id] = legislator
+
+            print("adding", len(created), "sponsoring legislators to the database")
+            if created:
+                upsert_legislators(created.values())
+                _resolved.update(created)
+                bump_dataset_version()
+
+    return {b: _resolved[b] for b in wanted if _resolved.get(b)}
+
+
+def add_legislator_with_bioguide(bioguide_id):
+    return resolve_legislators([bioguide_id]).get(bioguide_id)
+
+
+def populate_donors(max_donors_per_committee=250, max_donors_per_campaign=50, incremental=False, resume=False):
+    done = PopulateCheckpoint.begin(DONORS, resume)
+    if PopulateCheckpoint.FINISHED in done:
+        print("donors already populated in the run being resumed")
+        return
+
+    started = PopulateCheckpoint.started(DONORS)
+    since = UpdateWatermark.current(DONORS) if incremental else None
     campaigns = Campaign.objects.all()
 
+    if since:
+        # receipts for past cycles stop arriving once they are closed out
+        current_cycle = datetime.now().year + datetime.now().year % 2
+        campaigns = campaigns.filter(election_year__gte=current_cycle - 1)
+        print("fetching receipts loaded since", since)
+
     print('begun populating for',len(campaigns),'campaigns')
 
     for campaign in campaigns:
 
+        if str(campaign.id) in done:
+            continue
+
         fec_id = campaign.fec_id
         election_year = campaign.election_year if campaign.election_year % 2 == 0 else campaign.election_year + 1
-        donors_set = set()
         if election_year > datetime.now().year:
+            PopulateCheckpoint.mark(DONORS, campaign.id)
             continue
 
+        # donors already stored for this campaign, loaded in one query
+        donors_set = {
+            (source, recipient, _date_key(date))
+            for source, recipient, date in Donor.objects.filter(campaign=campaign).values_list(
+                "source_name", "recipient_name", "contribution_receipt_date"
+            )
+        }
+
         # get all the committees associated
         params = {
             "api_key": FEC_API_KEY,
@@ -109,10 +188,9 @@ def populate_donors(max_donors_per_committee=250, max_donors_per_campaign=50):
             f"{FEC_BASE_URL}/candidate/{fec_id}/committees", params=params
         ).get("results", [])
 
-        donorsToAdd = []
+        receipt_params = []
         for committee in committees:
 
-            donor_objs = []
             if committee.get("committee_id") == None:
                 continue
 
@@ -123,9 +201,23 @@ def populate_donors(max_donors_per_committee=250, max_donors_per_campaign=50):
                 "sort": "-contribution_receipt_amount",
                 "api_key": FEC_API_KEY,
             }
-            scheduleAs = req.safe_request_params(
-                f"{FEC_BASE_URL}/schedules/schedule_a/", params=params
-            ).get("results", [])
+            if since:
+                params["min_load_date"] = since[:10]
+            receipt_params.append(params)
+
+        # schedule_a queries are slow; with every committee's in flight at
+        # once, the FEC rate limit rather than their latency sets the pace
+        with AsyncRequest(req, max_concurrency=DONOR_WORKERS) as areq:
+            receipts = areq.gather(
+                areq.safe_request_params(f"{FEC_BASE_URL}/schedules/schedule_a/", params=params)
+                for params in receipt_params
+            )
+
+        donorsToAdd = []
+        for receipt in receipts:
+
+            donor_objs = []
+            scheduleAs = receipt.get("results", [])
             for donor in scheduleAs:
 
                 if (
@@ -141,22 +233,13 @@ def populate_donors(max_donors_per_committee=250, max_donors_per_campaign=50):
                 donor_key = (
                     donor.get("contributor_name") or "",
                     donor.get("committee").get("name") or "",
-                    donor.get("contribution_receipt_date") or "",
+                    _date_key(donor.get("contribution_receipt_date") or ""),
                 )
 
                 if donor_key in donors_set:
                     continue
                 donors_set.add(donor_key)
 
-                if Donor.objects.filter(
-                    source_name=donor.get("contributor_name") or "",
-                    recipient_name=donor.get("committee").get("name") or "",
-                    campaign=campaign,
-                    contribution_receipt_date=donor.get("contribution_receipt_date")
-                    or "",
-                ).exists():
-                    continue
-
                 donor_obj = Donor(
                     campaign=campaign,
                     recipient_name=donor.get("committee").get("name"),
@@ -177,16 +260,36 @@ def populate_donors(max_donors_per_committee=250, max_donors_per_campaign=50):
             reverse=True,
         )
         donorsToAdd = donorsToAdd[: min(len(donorsToAdd), max_donors_per_campaign)]
-        Donor.objects.bulk_create(donorsToAdd)
-
+        Donor.objects.bulk_create(donorsToAdd, ignore_conflicts=True)
+        if donorsToAdd:
+            LegislatorFinanceSummary.refresh([campaign.legislator_id])
+        PopulateCheckpoint.mark(DONORS, campaign.id)
+
+    UpdateWatermark.advance(DONORS, started)
+    PopulateCheckpoint.finish(DONORS)
+
+
+def populate_campaigns(resume=False, refresh=False):
+    """
+    Add each legislator's FEC campaigns with their totals. Campaigns are
+    upserted, so totals of cycles already stored are brought up to date;
+    with refresh, legislators that already have campaigns are included.
+    """
+    done = PopulateCheckpoint.begin(CAMPAIGNS, resume)
+    if PopulateCheckpoint.FINISHED in done:
+        print("campaigns already populated in the run being resumed")
+        return
 
-def populate_campaigns():
     legislators = Legislator.objects.all()
+    with_campaigns = set(Campaign.objects.values_list("legislator_id", flat=True).distinct())
 
     print("populating campaigns has begun for ", len(legislators), "legislators")
 
     for l in legislators:
 
+        if l.bioguide_id in done:
+            continue
+
         # create term object
         fec_params = {
             # "name": l['name'],
@@ -195,7 +298,7 @@ def populate_campaigns():
         }
 
         #TODO remove dis pls
-        if Campaign.objects.filter(bioguide_id=l.bioguide_id).exists():
+        if not refresh and l.bioguide_id in with_campaigns:
             print('skipping', l.full_name)
             continue
 
@@ -222,19 +325,11 @@ def populate_campaigns():
             totals_map = {total["candidate_election_year"]: total for total in totals}
 
             for year in election_years:
-                exists = Campaign.objects.filter(
-                        fec_id=o["candidate_id"],
-                        election_year=year,
-                ).exists()
-
-                if exists:
-                    continue
-
                 fec_params = {"api_key": FEC_API_KEY}
 
                 campaign_obj = Campaign(
                     fec_id=o.get("candidate_id", ""),
-                    bioguide_id=l,
+                    legislator=l,
                     election_year=year,
                     office_full=o.get("office_full", ""),
                     other_political_committee_contributions=totals_map.get(
@@ -251,14 +346,35 @@ def populate_campaigns():
                 )
                 campaigns.append(campaign_obj)
         print("adding ", len(campaigns), " campaigns for ", l.full_name)
-        Campaign.objects.bulk_create(campaigns)
-
+        upsert_campaigns(campaigns)
+        LegislatorFinanceSummary.refresh([l.bioguide_id])
+        PopulateCheckpoint.mark(CAMPAIGNS, l.bioguide_id)
+
+    PopulateCheckpoint.finish(CAMPAIGNS)
+
+
+def populate_legislatures(congress_number=119, total_legislators=-1, incremental=False, resume=False, refresh=False):
+    """
+    Add missing members; members already stored are skipped. With refresh,
+    every member of the congress is fetched again and stored rows are
+    updated in place (party, chamber, current_member, ...). With
+    incremental, only members Congress.gov reports as updated since the
+    last incremental run are fetched, and likewise updated in place (the
+    first such run refreshes all).
+    """
+    done = PopulateCheckpoint.begin(LEGISLATORS, resume)
+    if PopulateCheckpoint.FINISHED in done:
+        print("legislators already populated in the run being resumed")
+        return
 
-def populate_legislatures(congress_number=119, total_legislators=-1):
     limit_per_request = 250
+    started = PopulateCheckpoint.started(LEGISLATORS)
+    since = UpdateWatermark.current(LEGISLATORS) if incremental else None
+    update = incremental or refresh
+
     if total_legislators == -1:
         _, total_legislators = get_all_legislators(
-            congress_number=congress_number, limit=1
+            congress_number=congress_number, limit=1, from_date_time=since
         )
 
     print("population has begun for", total_legislators, "legislators")
@@ -270,11 +386,25 @@ def populate_legislatures(congress_number=119, total_legislators=-1):
         if total_legislators - offset < limit_per_request:
             limit_per_request = total_legislators - offset
 
+        if str(offset) in done:
+            continue
+
         legislators, _ = get_all_legislators(
-            congress_number=congress_number, limit=limit_per_request, offset=offset
+            congress_number=congress_number,
+            limit=limit_per_request,
+            offset=offset,
+            from_date_time=since,
         )
         relevant = []
 
+        # members from this page that are already stored, in one query
+        if not update:
+            ids.update(
+                Legislator.objects.filter(
+                    bioguide_id__in=[l.get("bioguideId") for l in legislators]
+                ).values_list("bioguide_id", flat=True)
+            )
+
         for l in legislators:
 
             key = l.get("bioguideId")
@@ -282,16 +412,12 @@ def populate_legislatures(congress_number=119, total_legislators=-1):
             if key in ids:
                 continue
 
-            legislator_exists = Legislator.objects.filter(bioguide_id=key).exists()
-
-            if legislator_exists:
-                continue
-
-            # Congress member more info
+            # Congress member more info; when updating stored rows a cached
+            # copy is revalidated so the update isn't made from stale data
             more_info_params = {"api_key": CONGRESS_API_KEY}
             more_info_link = l["url"]
             more_info = req.safe_request_params(
-                url=more_info_link, params=more_info_params
+                url=more_info_link, params=more_info_params, revalidate=update
             ).get("member", {})
 
             if more_info.get("firstName") == None or more_info.get("lastName") == None:
@@ -319,6 +445,13 @@ def populate_legislatures(congress_number=119, total_legislators=-1):
             relevant.append(legislator_obj)
             ids.add(key)
         print("adding", len(relevant), "legislators to the database")
-        Legislator.objects.bulk_create(relevant)
+        upsert_legislators(relevant)
+        if relevant:
+            bump_dataset_version()
+        PopulateCheckpoint.mark(LEGISLATORS, offset)
+
+    if incremental:
+        UpdateWatermark.advance(LEGISLATORS, started)
+    PopulateCheckpoint.finish(LEGISLATORS)
 
 # FEC API call: put all query params in params dictionary
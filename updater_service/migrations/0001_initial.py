@@ -0,0 +1,22 @@
+# Generated by Django 4.2.27 on 2026-10-18 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UpdateWatermark',
+            fields=[
+                ('dataset', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.CharField(max_length=50)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.27 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('updater_service', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopulateCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('stage', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+
+from django.db import models
+
+# -----------------------------
+# Models
+# -----------------------------
+
+# populate stages; all but campaigns also have a watermark
+LEGISLATORS = "legislators"
+CAMPAIGNS = "campaigns"
+BILLS = "bills"
+DONORS = "donors"
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+class UpdateWatermark(models.Model):
+    """
+    High-water mark of an incremental populate run: the time (UTC, ISO 8601
+    as Congress.gov's fromDateTime expects it) the last successful run of a
+    dataset started. The next --incremental run only asks upstream for
+    records changed since then.
+    """
+    dataset = models.CharField(primary_key=True, max_length=50)
+    value = models.CharField(max_length=50)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.dataset} @ {self.value}"
+
+    @staticmethod
+    def now():
+        return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+    @classmethod
+    def current(cls, dataset):
+        mark = cls.objects.filter(dataset=dataset).first()
+        return mark.value if mark else None
+
+    @classmethod
+    def advance(cls, dataset, value):
+        # called with the time the run *started*, so anything changed while
+        # it ran is picked up again next time
+        cls.objects.update_or_create(dataset=dataset, defaults={"value": value})
+
+
+class PopulateCheckpoint(models.Model):
+    """
+    A unit of populate work that has been written to the database (a page
+    of members, a legislator's campaigns or bills, a campaign's donors).
+
+    A stage calls begin() when it starts: a normal run clears the previous
+    run's checkpoints, a --resume run keeps them and skips every key already
+    recorded. finish() records that the whole stage completed.
+    """
+    STARTED = "__started__"
+    FINISHED = "__finished__"
+
+    stage = models.CharField(max_length=50)
+    key = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("stage", "key")
+
+    def __str__(self):
+        return f"{self.stage}: {self.key}"
+
+    @classmethod
+    def begin(cls, stage, resume=False):
+        """Keys completed so far in this run of the stage."""
+        if not resume:
+            cls.objects.filter(stage=stage).delete()
+        cls.mark(stage, cls.STARTED)
+        return set(cls.objects.filter(stage=stage).values_list("key", flat=True))
+
+    @classmethod
+    def started(cls, stage):
+        """When the run being resumed began, in UpdateWatermark's format."""
+        first = cls.objects.filter(stage=stage, key=cls.STARTED).first()
+        return first.created_at.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT) if first else UpdateWatermark.now()
+
+    @classmethod
+    def mark(cls, stage, *keys):
+        cls.objects.bulk_create(
+            [cls(stage=stage, key=str(key)) for key in keys],
+            ignore_conflicts=True,
+        )
+
+    @classmethod
+    def finish(cls, stage):
+        cls.mark(stage, cls.FINISHED)
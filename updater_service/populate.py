@@ -1,3 +1,4 @@
+import argparse
 import os
 from dotenv import load_dotenv
 import django
@@ -16,23 +17,62 @@ load_dotenv()
 
 # 4. Initialize Django
 django.setup()
+import bill_populate
+import legislater_populate
 from legislater_populate import (
     populate_donors,
 )
 from bill_populate import populate_sponsored_bills
+from core.dataset_version import bump_dataset_version
 
 def main():
-    # adds total amount of legislators
-    # populate_legislatures(congress_number=CONGRESS_NUMBER, total_legislators=-1)
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only fetch records changed upstream since the last run, and update them in place",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="fetch members that are already stored again and update them in place (party, chamber, ...)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the previous run from its last checkpoint instead of starting over",
+    )
+    args = parser.parse_args()
 
-    # adds terms and totals for terms
-    # populate_campaigns()
+    try:
+        # adds total amount of legislators
+        # populate_legislatures(congress_number=CONGRESS_NUMBER, total_legislators=-1, incremental=args.incremental, resume=args.resume, refresh=args.refresh)
 
+        # adds terms and totals for terms
+        # populate_campaigns(refresh=args.incremental, resume=args.resume)
 
-    # #adds 20 most revent bills with their subjects, sponsors
-    populate_sponsored_bills(total_pool=500, max_relevant=50)
 
-    # #adds 50 top donors to each campaign
-    populate_donors(max_donors_per_committee=50, max_donors_per_campaign=50)
+        # #adds 20 most revent bills with their subjects, sponsors
+        populate_sponsored_bills(total_pool=500, max_relevant=50, incremental=args.incremental, resume=args.resume)
+        bump_dataset_version()
+
+        # #adds 50 top donors to each campaign
+        populate_donors(max_donors_per_committee=50, max_donors_per_campaign=50, incremental=args.incremental, resume=args.resume)
+        bump_dataset_version()
+    except RuntimeError as e:
+        # everything written so far is checkpointed
+        bump_dataset_version()
+        print(e)
+        print(
+            "run stopped; continue it with: python populate.py --resume"
+            + (" --incremental" if args.incremental else "")
+            + (" --refresh" if args.refresh else "")
+        )
+        sys.exit(1)
+
+    # connection reuse across the run (requests sent vs connections opened)
+    for module in (legislater_populate, bill_populate):
+        stats = module.req.connection_stats()
+        print(module.__name__, "requests:", stats["requests"], "connections:", stats["connections"], "reused:", stats["reused"])
 
 main()
@@ -0,0 +1,216 @@
+"""
+Local stand-in for Congress.gov / OpenFEC that replays recorded responses.
+
+Record a run first (any populate stage works):
+
+    UPDATER_RECORD=recording.sqlite3 UPDATER_RESPONSE_CACHE=off python populate.py
+
+then serve it, one port per upstream host found in the recording:
+
+    python replay_server.py recording.sqlite3 --latency 0.2 --error-rate 0.02 \
+        --rate-limit api.open.fec.gov=1000 --rate-limit api.congress.gov=5000
+
+and point the updater at it with the variables the server prints. Links to
+other recorded hosts inside response bodies (member urls, text versions,
+...) are rewritten to the matching local port so they are replayed too.
+An existing updater_cache.sqlite3 can be served the same way.
+"""
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from response_cache import ResponseCache
+
+# upstream base url -> env var the updater reads it from
+BASE_URL_ENV = {
+    "api.congress.gov": ("UPDATER_CONGRESS_BASE_URL", "/v3"),
+    "api.open.fec.gov": ("UPDATER_FEC_BASE_URL", "/v1"),
+}
+
+INJECTED_ERRORS = (429, 500, 502, 503)
+
+
+class HourlyLimit:
+    """Fixed one-hour window, reported the way api.data.gov does."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.window = time.monotonic()
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def take(self):
+        """(allowed, remaining) for one more request."""
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window >= 3600:
+                self.window = now
+                self.used = 0
+            if self.used >= self.limit:
+                return False, 0
+            self.used += 1
+            return True, self.limit - self.used
+
+
+class Replay:
+    def __init__(self, path, latency=0.0, jitter=0.0, error_rate=0.0, rate_limits=None):
+        self.cache = ResponseCache(path)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limits = {host: HourlyLimit(n) for host, n in (rate_limits or {}).items()}
+        self.origins = {}   # "scheme://host" -> "http://127.0.0.1:port"
+        self.served = 0
+        self.missing = 0
+        self.injected = 0
+
+    def recorded_hosts(self):
+        # raw sqlite: ResponseCache has no listing API
+        conn = sqlite3.connect(self.cache.path)
+        try:
+            urls = [row[0] for row in conn.execute("SELECT url FROM responses")]
+        finally:
+            conn.close()
+        return sorted({(urlparse(u).scheme, urlparse(u).netloc) for u in urls})
+
+    def rewrite(self, body):
+        for origin, local in self.origins.items():
+            body = body.replace(origin.encode(), local.encode())
+        return body
+
+    def lookup(self, scheme, host, path, accept):
+        entry = self.cache.get(f"{scheme}://{host}{path}", None, accept)
+        return entry.response() if entry else None
+
+
+def make_handler(replay, scheme, host):
+    limit = replay.rate_limits.get(host)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, content_type="application/json", headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type or "application/octet-stream")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            delay = replay.latency + random.uniform(-replay.jitter, replay.jitter)
+            if delay > 0:
+                time.sleep(delay)
+
+            headers = {}
+            if limit:
+                allowed, remaining = limit.take()
+                headers = {"X-RateLimit-Limit": str(limit.limit), "X-RateLimit-Remaining": str(remaining)}
+                if not allowed:
+                    replay.injected += 1
+                    headers["Retry-After"] = "3600"
+                    return self._send(429, b'{"error": "rate limit exceeded"}', headers=headers)
+
+            if replay.error_rate and random.random() < replay.error_rate:
+                replay.injected += 1
+                status = random.choice(INJECTED_ERRORS)
+                if status == 429:
+                    headers["Retry-After"] = "1"
+                return self._send(status, json.dumps({"error": f"injected {status}"}).encode(), headers=headers)
+
+            resp = replay.lookup(scheme, host, self.path, self.headers.get("Accept"))
+            if resp is None:
+                replay.missing += 1
+                return self._send(404, json.dumps({"error": "not recorded", "path": self.path}).encode(), headers=headers)
+
+            replay.served += 1
+            self._send(resp.status_code, replay.rewrite(resp.content), resp.headers.get("Content-Type"), headers)
+
+    return Handler
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # streamed text is read only up to the title, then the client hangs up
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+def serve(replay, bind="127.0.0.1", first_port=8601):
+    servers = []
+    hosts = replay.recorded_hosts()
+    for i, (scheme, host) in enumerate(hosts):
+        server = ReplayServer((bind, first_port + i if first_port else 0), make_handler(replay, scheme, host))
+        replay.origins[f"{scheme}://{host}"] = f"http://{bind}:{server.server_port}"
+        servers.append(server)
+
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return servers
+
+
+def env_for(replay):
+    """Environment that sends the updater to the replay servers."""
+    env = {"UPDATER_RESPONSE_CACHE": "off"}
+    limits = []
+    for origin, local in replay.origins.items():
+        host = urlparse(origin).netloc
+        if host in BASE_URL_ENV:
+            name, prefix = BASE_URL_ENV[host]
+            env[name] = local + prefix
+        # client-side pacing is the server's job here (see --rate-limit)
+        limits.append(f"{urlparse(local).netloc}=0")
+    env["UPDATER_RATE_LIMITS"] = ",".join(limits)
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="SQLite file written with UPDATER_RECORD (or a response cache)")
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8601, help="first port; one per recorded host")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429/5xx")
+    parser.add_argument(
+        "--rate-limit", action="append", default=[], metavar="HOST=PER_HOUR",
+        help="answer 429 past this many requests per hour, with X-RateLimit-* headers",
+    )
+    args = parser.parse_args()
+
+    rate_limits = {}
+    for entry in args.rate_limit:
+        host, per_hour = entry.split("=")
+        rate_limits[host.strip()] = int(per_hour)
+
+    replay = Replay(args.recording, args.latency, args.jitter, args.error_rate, rate_limits)
+    serve(replay, args.bind, args.port)
+
+    for origin, local in replay.origins.items():
+        print("replaying", origin, "on", local)
+    print()
+    for name, value in env_for(replay).items():
+        print(f"export {name}={value}")
+
+    try:
+        while True:
+            time.sleep(60)
+            print("served", replay.served, "not recorded", replay.missing, "injected errors", replay.injected)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+from threading import Lock
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+DAY = 24 * 60 * 60
+
+# (path regex, seconds a cached response is served without asking upstream)
+# first match wins; bill text documents never change once published
+DEFAULT_TTLS = [
+    (r"\.(xml|htm|pdf)$", 365 * DAY),
+    (r"/bill/\d+/\w+/\d+/text$", 7 * DAY),
+    (r"/bill/\d+/\w+/\d+/subjects$", 7 * DAY),
+    (r"/bill/\d+/\w+/\d+/?$", DAY),
+    (r"/member/[^/]+/sponsored-legislation$", DAY),
+    (r"/member/[^/]+$", 7 * DAY),
+    (r"/member/?$", DAY),
+    (r"/candidates/search/?$", 7 * DAY),
+    (r"/candidate/[^/]+/committees$", 7 * DAY),
+    (r"/candidate/[^/]+/totals$", DAY),
+    (r"/schedules/schedule_a/?$", DAY),
+]
+DEFAULT_TTL = DAY
+
+# never part of a cache key, never written to disk
+SECRET_PARAMS = {"api_key"}
+
+
+class CachedResponse:
+    """The parts of requests.Response the updater reads, rebuilt from disk."""
+
+    def __init__(self, url, status_code, content_type, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = {"Content-Type": content_type}
+        self.content = content
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        pass
+
+
+class CacheEntry:
+    def __init__(self, key, url, status_code, content_type, etag, last_modified, fetched_at, body, ttl):
+        self.key = key
+        self.url = url
+        self.status_code = status_code
+        self.content_type = content_type
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.content = zlib.decompress(body)
+        self.ttl = ttl
+
+    @property
+    def fresh(self):
+        return time.time() - self.fetched_at < self.ttl
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def response(self):
+        return CachedResponse(self.url, self.status_code, self.content_type, self.content)
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of upstream responses in a single SQLite file.
+
+    Keys are sha256(normalized url + params + Accept) with api_key removed,
+    so the same request made with a different key (or from a re-run) hits.
+    Bodies are zlib compressed. Entries past their TTL are still kept: the
+    client revalidates them with If-None-Match / If-Modified-Since when
+    upstream sent validators, and falls back to a full fetch otherwise.
+    """
+
+    def __init__(self, path, ttls=None, default_ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttls = [(re.compile(p), ttl) for p, ttl in (ttls or DEFAULT_TTLS)]
+        self.default_ttl = default_ttl
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale = 0
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                body BLOB NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    @classmethod
+    def from_env(cls):
+        """UPDATER_RESPONSE_CACHE=<path> (default next to the repo), or "off"."""
+        default = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "updater_cache.sqlite3")
+        path = os.getenv("UPDATER_RESPONSE_CACHE", default)
+        if not path or path.lower() == "off":
+            return None
+        return cls(path)
+
+    # -----------------------------
+    # Keys
+    # -----------------------------
+
+    @staticmethod
+    def normalize(url, params=None):
+        parts = urlparse(url)
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS]
+        query += [(k, str(v)) for k, v in (params or {}).items() if k not in SECRET_PARAMS]
+        return urlunparse(parts._replace(query=urlencode(sorted(query))))
+
+    @staticmethod
+    def key(normalized_url, accept):
+        return hashlib.sha256(f"{accept}|{normalized_url}".encode("utf-8")).hexdigest()
+
+    def ttl_for(self, normalized_url):
+        path = urlparse(normalized_url).path
+        for pattern, ttl in self.ttls:
+            if pattern.search(path):
+                return ttl
+        return self.default_ttl
+
+    # -----------------------------
+    # Reads / writes
+    # -----------------------------
+
+    def get(self, url, params=None, accept=None):
+        normalized = self.normalize(url, params)
+        key = self.key(normalized, accept)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT key, url, status_code, content_type, etag, last_modified, fetched_at, body "
+                "FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        entry = CacheEntry(*row, ttl=self.ttl_for(normalized))
+        if entry.fresh:
+            self.hits += 1
+        else:
+            self.stale += 1
+        return entry
+
+    def put(self, url, params, accept, resp):
+        normalized = self.normalize(url, params)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, status_code, content_type, etag, last_modified, fetched_at, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.key(normalized, accept),
+                    normalized,
+                    resp.status_code,
+                    resp.headers.get("Content-Type"),
+                    resp.headers.get("ETag"),
+                    resp.headers.get("Last-Modified"),
+                    time.time(),
+                    zlib.compress(resp.content),
+                ),
+            )
+            self.conn.commit()
+
+    def put_value(self, url, params, accept, value, content_type="text/plain"):
+        """Store a value derived from a response (e.g. one field of a large document) under its own accept key."""
+        self.put(url, params, accept, CachedResponse(url, 200, content_type, value.encode("utf-8")))
+
+    def touch(self, entry):
+        """Upstream answered 304: the stored body is current again."""
+        self.revalidated += 1
+        with self.lock:
+            self.conn.execute("UPDATE responses SET fetched_at = ? WHERE key = ?", (time.time(), entry.key))
+            self.conn.commit()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "revalidated": self.revalidated,
+        }
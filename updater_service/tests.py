@@ -0,0 +1,419 @@
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qsl, urlparse
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.db_models.bill import Bill, BillSponsor
+from core.db_models.campaign import Campaign, Donor
+from core.db_models.legislator import Legislator
+from updater_service.models import (
+    BILLS, DONORS, LEGISLATORS, TIMESTAMP_FORMAT, PopulateCheckpoint, UpdateWatermark,
+)
+
+# the populate scripts import their siblings as top level modules; their
+# module level clients are replaced by FakeUpstream in every test, so
+# importing them must not open the on-disk response cache
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+with mock.patch.dict(os.environ, {"UPDATER_RESPONSE_CACHE": "off"}):
+    import bill_populate
+    import legislater_populate
+    from utils import AsyncRequest
+
+# -----------------------------
+# Resumable / incremental populate runs
+# -----------------------------
+
+# a page of /member is 250 members, so this is two pages
+MEMBERS = 260
+# what the STARTED checkpoint of an interrupted run is backdated to
+RUN_STARTED = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+PREVIOUS_WATERMARK = "2025-01-01T00:00:00Z"
+
+
+def member_id(i):
+    return f"M{i:06d}"
+
+
+class FakeUpstream:
+    """
+    Stands in for utils.Request: answers Congress.gov and OpenFEC calls from
+    canned members, bills and committees, and raises RuntimeError (what
+    Request raises once its retries run out) on the first call
+    `fail(path, params)` accepts.
+    """
+
+    def __init__(
+        self, members=MEMBERS, party="Democratic", sponsored=None, updated_bills=(), committees=(), fail=None,
+    ):
+        self.members = [member_id(i) for i in range(members)]
+        self.party = party
+        self.sponsored = sponsored or {}    # bioguide_id -> bill numbers
+        self.updated_bills = list(updated_bills)
+        self.committees = list(committees)  # of every candidate
+        self.fail = fail
+        self.calls = []                     # (path, params, revalidate)
+
+    def safe_request(self, url, headers=None, max_retries=5, timeout=10, revalidate=False):
+        return self.safe_request_params(url, headers=headers, revalidate=revalidate)
+
+    def safe_request_params(self, url, headers=None, params=None, max_retries=5, timeout=10, revalidate=False):
+        parts = urlparse(url)
+        params = {**dict(parse_qsl(parts.query)), **(params or {})}
+        self.calls.append((parts.path, params, revalidate))
+        if self.fail and self.fail(parts.path, params):
+            self.fail = None
+            raise RuntimeError(f"Failed to fetch: {url}")
+        return self.respond(parts.path, params)
+
+    def paths(self, pattern):
+        return [path for path, _, _ in self.calls if re.search(pattern, path)]
+
+    def respond(self, path, params):
+        if path.endswith("/member"):
+            offset, limit = int(params["offset"]), int(params["limit"])
+            return {
+                "members": [self.listed_member(b) for b in self.members[offset:offset + limit]],
+                "pagination": {"count": len(self.members)},
+            }
+        if match := re.search(r"/member/(\w+)/sponsored-legislation$", path):
+            numbers = self.sponsored.get(match.group(1), [])
+            return {"sponsoredLegislation": [self.listed_bill(n) for n in numbers], "pagination": {"count": len(numbers)}}
+        if match := re.search(r"/member/(\w+)$", path):
+            return {"member": self.member(match.group(1))}
+        if path.endswith("/bill"):
+            return {"bills": [self.listed_bill(n) for n in self.updated_bills], "pagination": {"count": len(self.updated_bills)}}
+        if match := re.search(r"/bill/\d+/\w+/(\d+)/?$", path):
+            return {"bill": {
+                "sponsors": [{"bioguideId": self.sponsor(match.group(1))}],
+                "subjects": {"count": 1, "url": f"https://api.congress.gov{path.rstrip('/')}/subjects?format=json"},
+            }}
+        if path.endswith("/subjects"):
+            return {"subjects": {"legislativeSubjects": [{"name": "Health"}]}}
+        if path.endswith("/committees"):
+            return {"results": [{"committee_id": c} for c in self.committees]}
+        if path.endswith("/schedules/schedule_a/"):
+            return {"results": self.receipts(params["committee_id"], int(params["per_page"]))}
+        raise AssertionError(f"unexpected call: {path}")
+
+    def listed_member(self, bioguide_id):
+        return {
+            "bioguideId": bioguide_id,
+            "url": f"{legislater_populate.CONGRESS_BASE_URL}/member/{bioguide_id}?format=json",
+            "partyName": self.party,
+            "state": "Ohio",
+            "district": 3,
+        }
+
+    def member(self, bioguide_id):
+        return {
+            "bioguideId": bioguide_id,
+            "firstName": "Pat",
+            "lastName": bioguide_id,
+            "directOrderName": f"Pat {bioguide_id}",
+            "birthYear": 1970,
+            "currentMember": True,
+            "terms": [{"chamber": "House of Representatives", "startYear": 2023}],
+        }
+
+    def listed_bill(self, number):
+        return {
+            "congress": 119,
+            "type": "HR",
+            "number": str(number),
+            "title": f"Bill {number} Act",
+            "introducedDate": f"2025-02-{number % 28 + 1:02d}",
+            "latestAction": {"actionDate": "2025-03-01"},
+        }
+
+    def receipts(self, committee_id, n):
+        # committee i's donors gave i * 100 + 1 .. i * 100 + n
+        base = (self.committees.index(committee_id) + 1) * 100
+        return [
+            {
+                "contributor_name": f"DONOR {committee_id} {i}",
+                "committee": {"name": f"{committee_id} FOR CONGRESS"},
+                "entity_type": "IND",
+                "contribution_receipt_amount": base + i,
+                "contribution_receipt_date": "2024-05-01",
+            }
+            for i in range(1, n + 1)
+        ]
+
+    def sponsor(self, number):
+        return next(b for b, numbers in self.sponsored.items() if int(number) in numbers)
+
+
+class PopulateTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # populate runs bump the dataset version; keep the real stamp alone
+        version_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(version_dir.cleanup)
+        override = override_settings(DATASET_VERSION_FILE=Path(version_dir.name) / "dataset.version")
+        override.enable()
+        cls.addClassCleanup(override.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        # legislators resolved by an earlier test's run
+        patcher = mock.patch.dict(legislater_populate._resolved, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_stage(self, fake, stage, **kwargs):
+        """Runs stage with both modules' clients replaced by fake, quietly."""
+        with (
+            mock.patch.object(legislater_populate, "req", fake),
+            mock.patch.object(bill_populate, "req", fake),
+            contextlib.redirect_stdout(io.StringIO()),
+        ):
+            stage(**kwargs)
+
+    def backdate_start(self, stage):
+        PopulateCheckpoint.objects.filter(stage=stage, key=PopulateCheckpoint.STARTED).update(created_at=RUN_STARTED)
+
+    def checkpoints(self, stage):
+        return set(PopulateCheckpoint.objects.filter(stage=stage).values_list("key", flat=True))
+
+
+class LegislatorPopulateTests(PopulateTestCase):
+    def populate(self, fake, **kwargs):
+        self.run_stage(fake, legislater_populate.populate_legislatures, congress_number=119, **kwargs)
+
+    def test_resume_skips_checkpointed_pages(self):
+        UpdateWatermark.advance(LEGISLATORS, PREVIOUS_WATERMARK)
+        # the first member of the second page
+        failing = FakeUpstream(fail=lambda path, params: path.endswith(f"/member/{member_id(250)}"))
+        with self.assertRaises(RuntimeError):
+            self.populate(failing, incremental=True)
+
+        self.assertEqual(Legislator.objects.count(), 250)
+        self.assertEqual(self.checkpoints(LEGISLATORS), {PopulateCheckpoint.STARTED, "0"})
+        self.assertEqual(UpdateWatermark.current(LEGISLATORS), PREVIOUS_WATERMARK)
+        self.backdate_start(LEGISLATORS)
+
+        resumed = FakeUpstream()
+        self.populate(resumed, incremental=True, resume=True)
+
+        self.assertEqual(Legislator.objects.count(), MEMBERS)
+        # only the count and the second page are listed, only its members fetched
+        self.assertEqual([params["offset"] for path, params, _ in resumed.calls if path.endswith("/member")], [0, 250])
+        self.assertEqual(
+            sorted(path.rsplit("/", 1)[1] for path in resumed.paths(r"/member/\w+$")),
+            [member_id(i) for i in range(250, MEMBERS)],
+        )
+        self.assertIn(PopulateCheckpoint.FINISHED, self.checkpoints(LEGISLATORS))
+        # the time the interrupted run started, not the resumed one
+        self.assertEqual(UpdateWatermark.current(LEGISLATORS), RUN_STARTED.strftime(TIMESTAMP_FORMAT))
+
+    def test_resume_of_finished_run_fetches_nothing(self):
+        self.populate(FakeUpstream(members=3))
+        resumed = FakeUpstream(members=3)
+        self.populate(resumed, resume=True)
+        self.assertEqual(resumed.calls, [])
+
+    def test_normal_run_leaves_stored_members(self):
+        self.populate(FakeUpstream(members=3))
+        rerun = FakeUpstream(members=3, party="Republican")
+        self.populate(rerun)
+
+        self.assertEqual(rerun.paths(r"/member/\w+$"), [])
+        self.assertEqual(set(Legislator.objects.values_list("current_party", flat=True)), {"Democratic"})
+        # a normal run has no watermark to advance
+        self.assertIsNone(UpdateWatermark.current(LEGISLATORS))
+
+    def test_refresh_updates_stored_members(self):
+        self.populate(FakeUpstream(members=3))
+        Legislator.objects.update(current_member=False, current_chamber="Senate")
+        refreshed = FakeUpstream(members=3, party="Republican")
+        self.populate(refreshed, refresh=True)
+
+        self.assertEqual(Legislator.objects.count(), 3)
+        self.assertEqual(
+            set(Legislator.objects.values_list("current_party", "current_member", "current_chamber")),
+            {("Republican", True, "House of Representatives")},
+        )
+        # cached member details are checked with upstream, not trusted
+        self.assertEqual([revalidate for path, _, revalidate in refreshed.calls if re.search(r"/member/\w+$", path)], [True] * 3)
+
+    def test_incremental_run_updates_and_advances_watermark(self):
+        self.populate(FakeUpstream(members=3))
+        UpdateWatermark.advance(LEGISLATORS, PREVIOUS_WATERMARK)
+        updated = FakeUpstream(members=3, party="Republican")
+        self.populate(updated, incremental=True)
+
+        self.assertEqual(set(Legislator.objects.values_list("current_party", flat=True)), {"Republican"})
+        self.assertTrue(all(revalidate for path, _, revalidate in updated.calls if re.search(r"/member/\w+$", path)))
+        listings = [params for path, params, _ in updated.calls if path.endswith("/member")]
+        self.assertTrue(all(params["fromDateTime"] == PREVIOUS_WATERMARK for params in listings))
+        self.assertGreater(UpdateWatermark.current(LEGISLATORS), PREVIOUS_WATERMARK)
+
+
+class SponsoredBillPopulateTests(PopulateTestCase):
+    # two bills for each of four legislators
+    SPONSORED = {member_id(i): [100 + 2 * i, 101 + 2 * i] for i in range(4)}
+
+    def setUp(self):
+        super().setUp()
+        self.populate_members()
+        # one fetch at a time, each bill written as soon as it is back, so
+        # the run is checkpointed at the finest grain
+        patcher = mock.patch.object(bill_populate, "WRITE_BATCH_SIZE", 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def populate_members(self):
+        self.run_stage(FakeUpstream(members=4), legislater_populate.populate_legislatures, congress_number=119)
+
+    def populate(self, fake, **kwargs):
+        self.run_stage(
+            fake, bill_populate.populate_sponsored_bills, total_pool=10, max_relevant=10, workers=1, **kwargs
+        )
+
+    def stored_bills(self):
+        return set(Bill.objects.values_list("number", flat=True))
+
+    def test_resume_skips_checkpointed_legislators_and_bills(self):
+        listings = []
+
+        def fourth_listing(path, params):
+            if path.endswith("/sponsored-legislation"):
+                listings.append(path)
+            return len(listings) == 4
+
+        failing = FakeUpstream(sponsored=self.SPONSORED, fail=fourth_listing)
+        with self.assertRaises(RuntimeError):
+            self.populate(failing)
+
+        written = self.stored_bills()
+        done = self.checkpoints(BILLS)
+        finished = {key for key in done if key in self.SPONSORED}
+        # with more bills queued than one worker may have pending, the
+        # first legislator's bills had to be written before the fourth listing
+        self.assertTrue(finished)
+        self.assertTrue(all(bill_populate.QUEUED + b in done for b in finished))
+        self.assertTrue(all({str(n) for n in self.SPONSORED[b]} <= written for b in finished))
+        self.assertNotIn(PopulateCheckpoint.FINISHED, done)
+        self.assertIsNone(UpdateWatermark.current(BILLS))
+        self.backdate_start(BILLS)
+
+        resumed = FakeUpstream(sponsored=self.SPONSORED)
+        self.populate(resumed, resume=True)
+
+        self.assertEqual(self.stored_bills(), {str(n) for numbers in self.SPONSORED.values() for n in numbers})
+        self.assertEqual(BillSponsor.objects.count(), 8)
+        # no listing of a finished legislator, no detail of a written bill
+        self.assertFalse({path.split("/")[-2] for path in resumed.paths("/sponsored-legislation$")} & finished)
+        refetched = {re.search(r"/(\d+)/?$", path).group(1) for path in resumed.paths(r"/bill/\d+/\w+/\d+/?$")}
+        self.assertFalse(refetched & written)
+        self.assertIn(PopulateCheckpoint.FINISHED, self.checkpoints(BILLS))
+        self.assertEqual(UpdateWatermark.current(BILLS), RUN_STARTED.strftime(TIMESTAMP_FORMAT))
+
+    def test_incremental_run_updates_changed_bills(self):
+        self.populate(FakeUpstream(sponsored=self.SPONSORED))
+        Bill.objects.filter(number="100").update(title="Old title")
+        UpdateWatermark.advance(BILLS, PREVIOUS_WATERMARK)
+
+        # 200 is sponsored by someone who isn't stored
+        sponsored = {**self.SPONSORED, "X000001": [200]}
+        updated = FakeUpstream(sponsored=sponsored, updated_bills=[100, 200])
+        self.populate(updated, incremental=True)
+
+        self.assertEqual(Bill.objects.get(number="100").title, "Bill 100 Act")
+        self.assertFalse(Bill.objects.filter(number="200").exists())
+        # the untracked bill costs its detail only
+        self.assertEqual(len(updated.paths("/hr/200/")), 1)
+        self.assertEqual(len(updated.paths("/hr/200/subjects$")), 0)
+        self.assertEqual(len(updated.paths("/hr/100/subjects$")), 1)
+        # the bills changed upstream, so cached copies aren't used
+        self.assertTrue(all(revalidate for path, _, revalidate in updated.calls if "/bill/" in path))
+        self.assertLessEqual({"119-HR-100", "119-HR-200"}, self.checkpoints(BILLS))
+        self.assertEqual(updated.paths("/sponsored-legislation$"), [])
+        self.assertGreater(UpdateWatermark.current(BILLS), PREVIOUS_WATERMARK)
+
+    def test_interrupted_incremental_run_keeps_watermark(self):
+        self.populate(FakeUpstream(sponsored=self.SPONSORED))
+        UpdateWatermark.advance(BILLS, PREVIOUS_WATERMARK)
+
+        failing = FakeUpstream(
+            sponsored=self.SPONSORED, updated_bills=[100, 102], fail=lambda path, params: path.endswith("/102/")
+        )
+        with self.assertRaises(RuntimeError):
+            self.populate(failing, incremental=True)
+        self.assertEqual(UpdateWatermark.current(BILLS), PREVIOUS_WATERMARK)
+
+        resumed = FakeUpstream(sponsored=self.SPONSORED, updated_bills=[100, 102])
+        self.populate(resumed, incremental=True, resume=True)
+        self.assertGreater(UpdateWatermark.current(BILLS), PREVIOUS_WATERMARK)
+
+
+class DonorPopulateTests(PopulateTestCase):
+    COMMITTEES = ["C001", "C002", "C003"]
+
+    def setUp(self):
+        super().setUp()
+        self.run_stage(FakeUpstream(members=1), legislater_populate.populate_legislatures, congress_number=119)
+        Campaign.objects.create(fec_id="H0OH03001", legislator_id=member_id(0), election_year=2024)
+
+    def test_receipts_of_every_committee(self):
+        fake = FakeUpstream(members=1, committees=self.COMMITTEES)
+        self.run_stage(fake, legislater_populate.populate_donors, max_donors_per_committee=5, max_donors_per_campaign=8)
+
+        fetched = [params["committee_id"] for path, params, _ in fake.calls if path.endswith("/schedule_a/")]
+        self.assertEqual(sorted(fetched), self.COMMITTEES)
+        # the largest 8 of the 15 receipts, across committees
+        self.assertEqual(
+            sorted(Donor.objects.values_list("contribution_receipt_amount", flat=True)),
+            [203, 204, 205, 301, 302, 303, 304, 305],
+        )
+        self.assertIn(PopulateCheckpoint.FINISHED, self.checkpoints(DONORS))
+        self.assertIsNotNone(UpdateWatermark.current(DONORS))
+
+    def test_failed_receipt_stops_the_campaign(self):
+        fake = FakeUpstream(
+            members=1, committees=self.COMMITTEES, fail=lambda path, params: params.get("committee_id") == "C002",
+        )
+        with self.assertRaises(RuntimeError):
+            self.run_stage(fake, legislater_populate.populate_donors)
+        self.assertFalse(Donor.objects.exists())
+        self.assertEqual(self.checkpoints(DONORS), {PopulateCheckpoint.STARTED})
+        self.assertIsNone(UpdateWatermark.current(DONORS))
+
+
+class AsyncRequestTests(SimpleTestCase):
+    class SlowRequest:
+        def __init__(self):
+            self.lock = threading.Lock()
+            self.in_flight = self.peak = 0
+
+        def safe_request_params(self, url, params=None):
+            with self.lock:
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+            time.sleep(0.05)
+            with self.lock:
+                self.in_flight -= 1
+            if url == "/fail":
+                raise RuntimeError(f"Failed to fetch: {url}")
+            return url
+
+    def test_bounded_concurrency_and_order(self):
+        request = self.SlowRequest()
+        with AsyncRequest(request, max_concurrency=3) as areq:
+            results = areq.gather(areq.safe_request_params(f"/{i}") for i in range(10))
+        self.assertEqual(results, [f"/{i}" for i in range(10)])
+        self.assertEqual(request.peak, 3)
+
+    def test_failure_is_raised(self):
+        with AsyncRequest(self.SlowRequest()) as areq, self.assertRaises(RuntimeError):
+            areq.gather(areq.safe_request_params(url) for url in ("/a", "/fail", "/b"))
@@ -0,0 +1,64 @@
+from core.db_models.bill import Bill
+from core.db_models.campaign import MONEY_FIELDS, Campaign
+from core.db_models.legislator import Legislator
+
+# -----------------------------
+# Bulk upserts
+# -----------------------------
+# INSERT ... ON CONFLICT DO UPDATE through bulk_create(update_conflicts=True):
+# new rows are inserted and stored rows refreshed in one statement per
+# batch, instead of a lookup plus .save() per row. Columns the updater
+# doesn't own (Bill.ethics_score) are left alone on conflict.
+
+BATCH_SIZE = 500
+
+LEGISLATOR_KEY = ["bioguide_id"]
+LEGISLATOR_FIELDS = [
+    "image_link",
+    "first_name",
+    "full_name",
+    "last_name",
+    "current_member",
+    "birth_year",
+    "current_party",
+    "state",
+    "state_code",
+    "district",
+    "current_chamber",
+]
+
+CAMPAIGN_KEY = ["fec_id", "election_year"]
+CAMPAIGN_FIELDS = ["legislator", "office_full", *MONEY_FIELDS]
+
+BILL_KEY = ["number", "type", "congress"]
+BILL_FIELDS = ["title", "update_date", "introduction_date", "short_summary"]
+
+
+def _dedupe(objs, key):
+    # one row per key within a statement, last one wins
+    return list({tuple(getattr(obj, f) for f in key): obj for obj in objs}.values())
+
+
+def _upsert(model, objs, key, fields, batch_size):
+    objs = _dedupe(objs, key)
+    if objs:
+        model.objects.bulk_create(
+            objs,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=key,
+            update_fields=fields,
+        )
+    return len(objs)
+
+
+def upsert_legislators(legislators, batch_size=BATCH_SIZE):
+    return _upsert(Legislator, legislators, LEGISLATOR_KEY, LEGISLATOR_FIELDS, batch_size)
+
+
+def upsert_campaigns(campaigns, batch_size=BATCH_SIZE):
+    return _upsert(Campaign, campaigns, CAMPAIGN_KEY, CAMPAIGN_FIELDS, batch_size)
+
+
+def upsert_bills(bills, batch_size=BATCH_SIZE):
+    return _upsert(Bill, bills, BILL_KEY, BILL_FIELDS, batch_size)
@@ -1,85 +1,327 @@
+import asyncio
+import os
 import requests
 import time
 import random
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from threading import Lock
+from urllib.parse import urlparse
 import json
+from requests.adapters import HTTPAdapter
+from response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
-class Request:
+# sentinel: build the on-disk response cache from UPDATER_RESPONSE_CACHE
+_FROM_ENV = object()
+
+# UPDATER_RECORD=<path>: also write every successful upstream response to
+# this file, for replay_server.py
+RECORD_PATH = os.getenv("UPDATER_RECORD")
+
+# Seconds between calls per upstream host. Override with
+# UPDATER_RATE_LIMITS="api.open.fec.gov=6,api.congress.gov=1.2"
+RATE_LIMITS = {
+    "api.open.fec.gov": 6,
+    "api.congress.gov": 1.2,
+}
+DEFAULT_RATE_LIMIT_SECONDS = 1.2
+
+for _entry in filter(None, os.getenv("UPDATER_RATE_LIMITS", "").split(",")):
+    _host, _seconds = _entry.split("=")
+    RATE_LIMITS[_host.strip()] = float(_seconds)
+
+
+class TokenBucket:
+    """
+    One token every `interval` seconds, holding at most `capacity` tokens.
+
+    Callers reserve a token up front (the count may go negative) and then
+    sleep for however long it takes to be refilled, so waiters are served in
+    arrival order and the sleep happens outside the lock. Safe to share between
+    threads.
+    """
+
+    def __init__(self, interval, capacity=1):
+        self.interval = interval
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = Lock()
+
+    def _reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.interval > 0:
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.interval)
+            else:
+                self.tokens = self.capacity
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens * self.interval)
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+_buckets = {}
+_buckets_lock = Lock()
+
+
+def get_bucket(url):
+    """Process-wide bucket for the url's host, shared by every client."""
+    host = urlparse(url).netloc
+    with _buckets_lock:
+        if host not in _buckets:
+            hostname = host.split(":")[0]
+            interval = RATE_LIMITS.get(host, RATE_LIMITS.get(hostname, DEFAULT_RATE_LIMIT_SECONDS))
+            _buckets[host] = TokenBucket(interval)
+        return _buckets[host]
+
+
+# max open connections kept per upstream host
+POOL_SIZE = int(os.getenv("UPDATER_POOL_SIZE", 10))
+
+
+class SessionPool:
+    """
+    One requests.Session per upstream host, each with its own urllib3
+    connection pool, so repeated calls reuse open TCP+TLS connections
+    instead of handshaking every time (module-level requests.get opens a
+    new connection per call).
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, keep_alive=True):
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.sessions = {}
+        self.lock = Lock()
+
+    def session(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                if not self.keep_alive:
+                    session.headers["Connection"] = "close"
+                self.sessions[host] = session
+            return self.sessions[host]
+
+    def stats(self):
+        """Requests sent vs connections opened, per host and overall."""
+        hosts = {}
+        with self.lock:
+            sessions = dict(self.sessions)
+        for host, session in sessions.items():
+            sent = opened = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is not None:
+                        sent += pool.num_requests
+                        opened += pool.num_connections
+            hosts[host] = {"requests": sent, "connections": opened, "reused": max(0, sent - opened)}
+
+        total = {
+            field: sum(h[field] for h in hosts.values())
+            for field in ("requests", "connections", "reused")
+        }
+        return dict(total, hosts=hosts)
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+
+
+def _accept(headers):
+    return headers.get("Accept")
+
+
+def _is_raw(headers):
+    # XML (bill text) responses are handed back as-is rather than decoded
+    return _accept(headers) == "application/xml"
+
+
+class RequestStats:
+    """Counters for one client, safe to bump from worker threads."""
+
+    FIELDS = ("http_calls", "cache_hits", "retries", "rate_limit_wait_s", "backoff_wait_s")
+
     def __init__(self):
-        self.LAST_CALL_TIME = 0.0
-        self.rate_lock = Lock()
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.values = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, field, amount=1):
+        with self.lock:
+            self.values[field] += amount
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.values)
+
+
+def _record(recorder, url, headers, params, resp):
+    if recorder and resp.status_code == 200:
+        # reading .content keeps the body available to iter_content()
+        recorder.put(url, params, _accept(headers), resp)
+
+
+class Request:
+    def __init__(self, cache=_FROM_ENV, pool_size=POOL_SIZE, keep_alive=True):
         self.call_number = 0
+        self.cache = ResponseCache.from_env() if cache is _FROM_ENV else cache
+        self.sessions = SessionPool(pool_size=pool_size, keep_alive=keep_alive)
+        self.recorder = ResponseCache(RECORD_PATH) if RECORD_PATH else None
+        self.stats = RequestStats()
 
-    def _rate_limit(self, RATE_LIMIT_SECONDS):
-        with self.rate_lock:
-            now = time.time()
-            elapsed = now - self.LAST_CALL_TIME
-            if elapsed < RATE_LIMIT_SECONDS:
-                time.sleep(RATE_LIMIT_SECONDS - elapsed)
-            self.LAST_CALL_TIME = time.time()
-    def _do_get(self, url, headers, params=None, timeout=10):
-        # wrapper for requests.get
-        return requests.get(url, headers=headers, params=params, timeout=timeout)
-
-    def safe_request(self, url, headers=None, max_retries=5, timeout=10):
-        headers = headers or {"Accept": "application/json"}
+    def _rate_limit(self, url):
+        # only calls to the same host wait on each other
+        self.stats.add("rate_limit_wait_s", get_bucket(url).acquire())
+
+    def _backoff(self, attempts):
+        backoff = min(60, 2 ** attempts) + random.random()
+        self.stats.add("retries")
+        self.stats.add("backoff_wait_s", backoff)
+        time.sleep(backoff)
+
+    def _do_get(self, url, headers, params=None, timeout=10, stream=False):
+        # wrapper for Session.get on the host's pooled session
+        self.stats.add("http_calls")
+        resp = self.sessions.session(url).get(url, headers=headers, params=params, timeout=timeout, stream=stream)
+        _record(self.recorder, url, headers, params, resp)
+        return resp
+
+    def connection_stats(self):
+        return self.sessions.stats()
+
+    def stream_request(self, url, headers=None, max_retries=5, timeout=10):
+        """
+        GET with stream=True for callers that only need the start of a large
+        body. Bypasses the response cache; the caller reads
+        resp.iter_content() and must close the response.
+        """
         attempts = 0
         while attempts < max_retries:
             attempts += 1
-
-            if "api.open.fec" in url:
-                self._rate_limit(6)
-            else:
-                self._rate_limit(1.2)
+            self._rate_limit(url)
             try:
-                resp = self._do_get(url, headers=headers, timeout=timeout)
-
-                if headers.get('Accept') == 'application/xml':
-                    return resp
-
+                resp = self._do_get(url, headers=headers, timeout=timeout, stream=True)
                 resp.raise_for_status()
                 self.call_number += 1
-                try:
-                    return resp.json()
-                except json.JSONDecodeError:
-                    logger.warning("Failed to decode JSON response (URL: %s)", url)
-                    raise
-            except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+                return resp
+            except requests.exceptions.RequestException as e:
                 logger.warning("Request failed (attempt %d/%d) for URL %s: %s", attempts, max_retries, url, e)
-                backoff = min(60, 2 ** attempts) + random.random()
-                time.sleep(backoff)
+                self._backoff(attempts)
         logger.error("Max retries exceeded for URL: %s", url)
         raise RuntimeError(f"Failed to fetch: {url}")
 
-    def safe_request_params(self, url, headers=None, params=None, max_retries=5, timeout=10):
+    def safe_request(self, url, headers=None, max_retries=5, timeout=10, revalidate=False):
+        return self._request(
+            url, headers=headers, params=None, max_retries=max_retries, timeout=timeout, revalidate=revalidate
+        )
+
+    def safe_request_params(self, url, headers=None, params=None, max_retries=5, timeout=10, revalidate=False):
+        return self._request(
+            url, headers=headers, params=params or {}, max_retries=max_retries, timeout=timeout, revalidate=revalidate
+        )
+
+    def _request(self, url, headers, params, max_retries, timeout, revalidate=False):
+        """
+        With revalidate, a cached response is never served on its TTL
+        alone: upstream is asked again (If-None-Match / If-Modified-Since,
+        so an unchanged record costs a 304), for records known to have
+        changed since they were cached.
+        """
         headers = headers or {"Accept": "application/json"}
-        params = params or {}
+
+        cached = self.cache.get(url, params, _accept(headers)) if self.cache else None
+        if cached and cached.fresh and not revalidate:
+            self.stats.add("cache_hits")
+            return cached.response() if _is_raw(headers) else json.loads(cached.content)
+
+        request_headers = dict(headers, **cached.conditional_headers()) if cached else headers
+
         attempts = 0
         while attempts < max_retries:
             attempts += 1
-            if "api.open.fec" in url:
-                self._rate_limit(6)
-            else:
-                self._rate_limit(1.2)
+            self._rate_limit(url)
             try:
-                resp = self._do_get(url, headers=headers, params=params, timeout=timeout)
+                resp = self._do_get(url, headers=request_headers, params=params, timeout=timeout)
+
+                if cached and resp.status_code == 304:
+                    self.cache.touch(cached)
+                    return cached.response() if _is_raw(headers) else json.loads(cached.content)
 
-                if headers.get('Accept') == 'application/xml':
+                if _is_raw(headers):
+                    if self.cache and resp.ok:
+                        self.cache.put(url, params, _accept(headers), resp)
                     return resp
 
                 resp.raise_for_status()
                 self.call_number += 1
                 try:
-                    return resp.json()
+                    data = resp.json()
                 except json.JSONDecodeError:
-                    logger.warning("Failed to decode JSON response with params (URL: %s)", url)
+                    logger.warning("Failed to decode JSON response (URL: %s)", url)
                     raise
+                if self.cache:
+                    self.cache.put(url, params, _accept(headers), resp)
+                return data
             except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
-                logger.warning("Request with params failed (attempt %d/%d) for URL %s: %s", attempts, max_retries, url, e)
-                backoff = min(60, 2 ** attempts) + random.random()
-                time.sleep(backoff)
-        logger.error("Max retries exceeded for URL with params: %s", url)
-        raise RuntimeError(f"Failed to fetch with params: {url}")
\ No newline at end of file
+                logger.warning("Request failed (attempt %d/%d) for URL %s: %s", attempts, max_retries, url, e)
+                self._backoff(attempts)
+        logger.error("Max retries exceeded for URL: %s", url)
+        raise RuntimeError(f"Failed to fetch: {url}")
+
+
+class AsyncRequest:
+    """
+    asyncio front end to a Request, with at most `max_concurrency` calls in
+    flight. Each call takes the Request's own path (response cache, per-host
+    token bucket, retries, stats) on one of this client's threads, so calls
+    to a host still go out no faster than its bucket allows, but a slow
+    response no longer holds up the calls queued behind it, and calls to
+    different hosts overlap.
+    """
+
+    def __init__(self, request, max_concurrency=4):
+        self.request = request
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="updater-http")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _call(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(method, *args, **kwargs))
+
+    async def safe_request(self, url, **kwargs):
+        return await self._call(self.request.safe_request, url, **kwargs)
+
+    async def safe_request_params(self, url, **kwargs):
+        return await self._call(self.request.safe_request_params, url, **kwargs)
+
+    def gather(self, calls):
+        """For sync callers: awaits the calls (coroutines of this client) together, results in order."""
+        async def run():
+            return await asyncio.gather(*calls)
+
+        return asyncio.run(run())
@@ -0,0 +1,18 @@
+from django.urls import path
+from . import async_views as views
+
+# Mirrors user_routes/urls.py with the async views; routes and names must
+# stay in sync with that file.
+urlpatterns = [
+    # GET /api/v1/legislatures/search/?q=...
+    path("legislatures/search/", views.search_legislator, name="search_legislator"),
+    # GET /api/v1/legislatures/autocomplete/?q=...
+    path("legislatures/autocomplete/", views.autocomplete_legislator, name="autocomplete_legislator"),
+    path("legislature/get/", views.get_legislator, name="get_legislator"),
+    # GET /api/v1/legislatures/get/?bioguide_ids=A000001,B000002
+    path("legislatures/get/", views.get_legislators, name="get_legislators"),
+    path("legislature/sponsored/legislation/", views.get_sponsored_legislation, name="get_sponsored_legislation"),
+    path("legislature/donors/", views.get_donors, name="get_donors"),
+    path("legislature/totals/", views.get_totals, name="get_totals"),
+    path("legislature/totals/summary/", views.get_finance_summary, name="get_finance_summary"),
+]
@@ -0,0 +1,292 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.utils.log import log_response
+
+from core.db_models.legislator import Legislator
+from core.db_models.campaign import Campaign, LegislatorFinanceSummary
+from user_routes.autocomplete import legislator_index
+from user_routes.cache import cached_response
+from user_routes.streaming import astream_json_response
+from user_routes.timing import measure
+from user_routes.views import (
+    AUTOCOMPLETE_LIMIT,
+    MAX_LIMIT,
+    STREAM_CHUNK_SIZE,
+    STREAM_MAX_LIMIT,
+    _batch_results,
+    _decode_cursor,
+    _encode_cursor,
+    _get_bioguide_ids,
+    _get_keywords,
+    _get_limit,
+    _load_body,
+    _ranked_donors,
+    _search_legislator,
+    _serialize_campaign,
+    _serialize_donor,
+    _serialize_finance_summary,
+    _serialize_legislator,
+    _split_page,
+    _sponsored_bills,
+    _wants_stream,
+)
+
+# -----------------------------
+# Async read endpoints
+# -----------------------------
+# Same routes, params and JSON as user_routes/views.py, written against the
+# async ORM so one ASGI worker can hold many slow clients without a thread
+# each. Served when DJANGO_ASYNC_VIEWS=true (see async_urls.py).
+
+
+def require_GET(view):
+    # django.views.decorators.http.require_GET only supports async views
+    # from Django 5.0 on
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            response = HttpResponseNotAllowed(["GET"])
+            log_response(
+                "Method Not Allowed (%s): %s", request.method, request.path,
+                response=response, request=request,
+            )
+            return response
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+async def _get_legislator(bioguide_id):
+
+    legislator = await Legislator.objects.filter(bioguide_id=bioguide_id).afirst()
+
+    if legislator is None:
+        return None, JsonResponse({"result": {}, "error": "bioguide_id does not exist"})
+
+    return legislator, None
+
+async def _get_campaigns(bioguide_id, stream=False):
+    """See views._get_campaigns; with stream, an async iterator."""
+    legislator, err = await _get_legislator(bioguide_id)
+
+    if err:
+        return None, JsonResponse({"result": {"campaigns":[]}, "error": "bioguide_id does not exist"})
+
+    campaigns = Campaign.objects.filter(legislator=legislator).order_by("id")
+
+    if stream:
+        rows = campaigns.aiterator(chunk_size=STREAM_CHUNK_SIZE)
+        first = await anext(rows, None)
+        campaigns = None if first is None else _achain(first, rows)
+    else:
+        campaigns = [c async for c in campaigns]
+
+    if not campaigns:
+        return None, JsonResponse({"result": {"campaigns":[]}, "error": "no campaigns exist for legislature:"+bioguide_id})
+
+    return campaigns, None
+
+async def _achain(first, rest):
+    yield first
+    async for item in rest:
+        yield item
+
+async def _stream_campaign_donors(campaigns, donors):
+    """Async counterpart of views._stream_campaign_donors."""
+    pending = await anext(donors, None)
+
+    for campaign in campaigns:
+        async def campaign_donors(campaign_id=campaign.id):
+            nonlocal pending
+            while pending is not None and pending.campaign_id == campaign_id:
+                yield _serialize_donor(pending)
+                pending = await anext(donors, None)
+
+        campaign_obj = _serialize_campaign(campaign)
+        campaign_obj["donors"] = campaign_donors()
+        yield campaign_obj
+
+# -----------------------------
+# Views
+# -----------------------------
+
+@require_GET
+@cached_response
+async def search_legislator(request):
+    """See views.search_legislator."""
+    q = request.GET.get("q") or ""
+    limit = _get_limit(request)
+
+    # raw FTS5 query; Django has no async cursor API
+    results = await sync_to_async(_search_legislator)(query=q, limit=limit)
+
+    with measure("serialize"):
+        return JsonResponse({"query": q, "results": results})
+
+
+@require_GET
+@cached_response
+async def autocomplete_legislator(request):
+    """See views.autocomplete_legislator."""
+    q = request.GET.get("q") or ""
+    limit = _get_limit(request, default=AUTOCOMPLETE_LIMIT)
+
+    if not legislator_index.is_current():
+        await sync_to_async(legislator_index.ensure_current)()
+    results = legislator_index.search(q, limit=limit)
+
+    with measure("serialize"):
+        return JsonResponse({"query": q, "results": results})
+
+
+@require_GET
+@cached_response
+async def get_legislator(request):
+    """See views.get_legislator."""
+    bioguide_id = request.GET.get("bioguide_id") or ""
+
+    legislator, err = await _get_legislator(bioguide_id)
+
+    if err:
+        return err
+
+    with measure("serialize"):
+        return JsonResponse({"result": _serialize_legislator(legislator)})
+
+
+@require_GET
+@cached_response
+async def get_legislators(request):
+    """See views.get_legislators."""
+    bioguide_ids, err = _get_bioguide_ids(request)
+    if err:
+        return err
+
+    found = await Legislator.objects.ain_bulk(bioguide_ids)
+
+    with measure("serialize"):
+        return JsonResponse({"results": _batch_results(bioguide_ids, found)})
+
+
+@require_GET
+@cached_response
+async def get_sponsored_legislation(request):
+    """See views.get_sponsored_legislation."""
+    bioguide_id = request.GET.get("bioguide_id") or ""
+    stream = _wants_stream(request)
+    limit = _get_limit(request, maximum=STREAM_MAX_LIMIT if stream else MAX_LIMIT)
+
+    after, err = _decode_cursor(request.GET.get("cursor"))
+    if err:
+        return err
+
+    data, err = _load_body(request)
+    if err:
+        return err
+
+    keywords, err = _get_keywords(request, data)
+    if err:
+        return err
+
+    legislator, err = await _get_legislator(bioguide_id)
+    if err:
+        return err
+
+    bills = _sponsored_bills(legislator, keywords, after, limit)
+
+    if stream:
+        page = {"next_cursor": None}
+
+        async def rows():
+            i = 0
+            async for bill in bills.aiterator(chunk_size=STREAM_CHUNK_SIZE):
+                if i == limit:
+                    page["next_cursor"] = _encode_cursor(last["introduction_date"], last["id"])
+                    break
+                last = bill
+                i += 1
+                yield bill
+
+        return astream_json_response({
+            "bioguide_id": bioguide_id,
+            "results": rows(),
+            "next_cursor": lambda: page["next_cursor"],
+        })
+
+    bills, next_cursor = _split_page([b async for b in bills], limit)
+
+    with measure("serialize"):
+        return JsonResponse({"bioguide_id": bioguide_id, "results": bills, "next_cursor": next_cursor})
+
+
+@require_GET
+@cached_response
+async def get_donors(request):
+    """See views.get_donors."""
+    bioguide_id = request.GET.get('bioguide_id') or ""
+    stream = _wants_stream(request)
+    limit = _get_limit(request, maximum=STREAM_MAX_LIMIT if stream else MAX_LIMIT)
+
+    campaigns, err = await _get_campaigns(bioguide_id)
+
+    if err:
+        return err
+
+    donors = _ranked_donors(campaigns, limit)
+
+    if stream:
+        donors = donors.aiterator(chunk_size=STREAM_CHUNK_SIZE)
+        return astream_json_response({'campaigns': _stream_campaign_donors(campaigns, donors)})
+
+    donors_by_campaign = {}
+    async for donor in donors:
+        donors_by_campaign.setdefault(donor.campaign_id, []).append(donor)
+
+    with measure("serialize"):
+        result_obj = {'campaigns':[]}
+
+        for campaign in campaigns:
+            campaign_obj = _serialize_campaign(campaign)
+            campaign_obj['donors'] = [_serialize_donor(d) for d in donors_by_campaign.get(campaign.id, [])]
+            result_obj['campaigns'].append(campaign_obj)
+
+        return JsonResponse(result_obj)
+
+
+@require_GET
+@cached_response
+async def get_totals(request):
+    """See views.get_totals."""
+    bioguide_id = request.GET.get("bioguide_id") or ""
+    stream = _wants_stream(request)
+
+    campaigns, err = await _get_campaigns(bioguide_id, stream=stream)
+
+    if err:
+        return err
+
+    if stream:
+        return astream_json_response({'campaigns': (_serialize_campaign(c) async for c in campaigns)})
+
+    with measure("serialize"):
+        return JsonResponse({'campaigns': [_serialize_campaign(c) for c in campaigns]})
+
+
+@require_GET
+@cached_response
+async def get_finance_summary(request):
+    """See views.get_finance_summary."""
+    bioguide_id = request.GET.get("bioguide_id") or ""
+
+    summary = await LegislatorFinanceSummary.objects.filter(legislator_id=bioguide_id).afirst()
+
+    if summary is None:
+        return JsonResponse({"result": {}, "error": "no finance summary exists for legislature:"+bioguide_id})
+
+    with measure("serialize"):
+        return JsonResponse({"result": _serialize_finance_summary(summary)})
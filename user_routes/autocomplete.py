@@ -0,0 +1,175 @@
+import logging
+import unicodedata
+from bisect import bisect_left
+from collections import namedtuple
+from threading import Lock
+
+from django.db import DatabaseError
+
+from core.dataset_version import get_dataset_version
+from core.db_models.legislator import Legislator
+
+# -----------------------------
+# In-process legislator prefix index
+# -----------------------------
+# Built from one query when the server starts (warm(), called from
+# backend/wsgi.py and backend/asgi.py) or else the first time autocomplete
+# is hit, then served from memory. The index remembers the dataset version
+# it was built from and rebuilds when updater_service bumps it (see
+# core/dataset_version.py).
+#
+# A build produces a new immutable Snapshot that replaces the old one in a
+# single assignment; search() reads the snapshot once, so a rebuild running
+# alongside it can never mix new rows with old keys.
+
+logger = logging.getLogger(__name__)
+
+# rank of a match, lower is better
+RANK_FULL_EXACT = 0
+RANK_FULL_PREFIX = 1
+RANK_LAST_PREFIX = 2
+RANK_FIRST_PREFIX = 3
+RANK_BIOGUIDE_PREFIX = 4
+RANK_WORD_PREFIX = 5
+
+_FIELDS = (
+    "bioguide_id",
+    "full_name",
+    "first_name",
+    "last_name",
+    "current_member",
+    "current_party",
+    "state",
+    "district",
+    "current_chamber",
+    "image_link",
+)
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse whitespace/punctuation."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join("".join(c if c.isalnum() else " " for c in text.lower()).split())
+
+
+# keys: sorted (key, rank, row_idx); words: sorted (word, row_idx) for
+# multi-token queries
+Snapshot = namedtuple("Snapshot", ("version", "rows", "keys", "words"))
+
+EMPTY = Snapshot(None, (), (), ())
+
+
+class LegislatorPrefixIndex:
+    def __init__(self):
+        self.snapshot = EMPTY
+        self.lock = Lock()
+
+    @property
+    def version(self):
+        return self.snapshot.version
+
+    def clear(self):
+        self.snapshot = EMPTY
+
+    # -----------------------------
+    # Build
+    # -----------------------------
+
+    def build(self, rows, version=None):
+        keys = []
+        words = []
+        for idx, row in enumerate(rows):
+            full = normalize(row["full_name"])
+            first = normalize(row["first_name"])
+            last = normalize(row["last_name"])
+
+            if full:
+                keys.append((full, RANK_FULL_PREFIX, idx))
+            if last:
+                keys.append((last, RANK_LAST_PREFIX, idx))
+                if first:
+                    keys.append((f"{first} {last}", RANK_FULL_PREFIX, idx))
+            if first:
+                keys.append((first, RANK_FIRST_PREFIX, idx))
+            keys.append((normalize(row["bioguide_id"]), RANK_BIOGUIDE_PREFIX, idx))
+
+            for word in set(f"{full} {first} {last}".split()):
+                words.append((word, idx))
+
+        keys.sort()
+        words.sort()
+
+        self.snapshot = Snapshot(version, tuple(rows), tuple(keys), tuple(words))
+
+    def is_current(self):
+        return self.version == get_dataset_version()
+
+    def ensure_current(self):
+        version = get_dataset_version()
+        if self.version == version:
+            return
+        with self.lock:
+            if self.version == version:
+                return
+            rows = list(Legislator.objects.values(*_FIELDS))
+            self.build(rows, version)
+
+    def warm(self):
+        """Builds the index ahead of the first request, if the database is ready."""
+        try:
+            self.ensure_current()
+        except DatabaseError as e:
+            # e.g. before the first migrate; the first request builds it
+            logger.warning("legislator index not built at startup: %s", e)
+
+    # -----------------------------
+    # Lookup
+    # -----------------------------
+
+    @staticmethod
+    def _scan(entries, prefix):
+        i = bisect_left(entries, (prefix,))
+        while i < len(entries) and entries[i][0].startswith(prefix):
+            yield entries[i]
+            i += 1
+
+    def search(self, query, limit=10):
+        q = normalize(query)
+        if not q:
+            return []
+
+        snapshot = self.snapshot
+        best = {}
+        for key, rank, idx in self._scan(snapshot.keys, q):
+            if key == q and rank == RANK_FULL_PREFIX:
+                rank = RANK_FULL_EXACT
+            if rank < best.get(idx, RANK_WORD_PREFIX + 1):
+                best[idx] = rank
+
+        # "bern sand" -> every token must prefix-match some word of the name
+        tokens = q.split()
+        if len(tokens) > 1:
+            matched = None
+            for token in tokens:
+                hits = {idx for _, idx in self._scan(snapshot.words, token)}
+                matched = hits if matched is None else matched & hits
+                if not matched:
+                    break
+            for idx in matched or ():
+                best.setdefault(idx, RANK_WORD_PREFIX)
+
+        rows = snapshot.rows
+        ordered = sorted(
+            best.items(),
+            key=lambda item: (
+                item[1],
+                not rows[item[0]]["current_member"],
+                rows[item[0]]["last_name"],
+                rows[item[0]]["first_name"],
+            ),
+        )
+        return [dict(rows[idx], rank=rank) for idx, rank in ordered[:limit]]
+
+
+legislator_index = LegislatorPrefixIndex()
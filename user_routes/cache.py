@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+from core.dataset_version import get_dataset_version
+
+# -----------------------------
+# Response cache
+# -----------------------------
+# Every read endpoint only changes when updater_service ingests new data, so
+# responses are cached per (endpoint, normalized params, dataset version).
+# The ETag is derived from the same triple, which means an If-None-Match
+# request is answered with a 304 before the view (or the ORM) runs at all.
+# Replies reporting an error (an unknown bioguide_id, ...) are sent as they
+# are: not cached and without an ETag.
+
+
+def _cache_key(request, endpoint, version):
+    params = sorted((k, sorted(v)) for k, v in request.GET.lists())
+    parts = [version, endpoint, repr(params)]
+    if request.body:
+        parts.append(hashlib.sha256(request.body).hexdigest())
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _etag_matches(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    # weak comparison, as If-None-Match requires
+    return "*" in etags or any(e.removeprefix("W/") == etag for e in etags)
+
+
+def _finalize(response, etag):
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def _from_cache(entry, etag):
+    content, content_type = entry
+    response = HttpResponse(content, content_type=content_type)
+    response["X-Cache"] = "HIT"
+    return _finalize(response, etag)
+
+
+def _is_error(response):
+    # the views answer e.g. an unknown bioguide_id with 200 {"error": ...}
+    if response.streaming or b'"error"' not in response.content:
+        return False
+    try:
+        body = json.loads(response.content)
+    except ValueError:
+        return False
+    return isinstance(body, dict) and "error" in body
+
+
+def _cacheable(response):
+    return response.status_code == 200 and not response.streaming
+
+
+def cached_response(view):
+    """Works for both sync views and the async ones in async_views.py."""
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            cache = caches[settings.API_RESPONSE_CACHE]
+            key = _cache_key(request, view.__name__, get_dataset_version())
+            etag = f'"{key[:32]}"'
+
+            if _etag_matches(request, etag):
+                return _finalize(HttpResponseNotModified(), etag)
+
+            entry = await cache.aget(key)
+            if entry is not None:
+                return _from_cache(entry, etag)
+
+            response = await view(request, *args, **kwargs)
+            if response.status_code != 200 or _is_error(response):
+                return response
+
+            if _cacheable(response):
+                await cache.aset(key, (response.content, response["Content-Type"]))
+                response["X-Cache"] = "MISS"
+            return _finalize(response, etag)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        cache = caches[settings.API_RESPONSE_CACHE]
+        key = _cache_key(request, view.__name__, get_dataset_version())
+        etag = f'"{key[:32]}"'
+
+        if _etag_matches(request, etag):
+            return _finalize(HttpResponseNotModified(), etag)
+
+        entry = cache.get(key)
+        if entry is not None:
+            return _from_cache(entry, etag)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code != 200 or _is_error(response):
+            return response
+
+        if _cacheable(response):
+            cache.set(key, (response.content, response["Content-Type"]))
+            response["X-Cache"] = "MISS"
+        return _finalize(response, etag)
+
+    return wrapper
@@ -0,0 +1,326 @@
+import contextlib
+import json
+import os
+import random
+import re
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from core.db_models.bill import Bill, BillSponsor, BillSubject
+from core.db_models.campaign import Campaign, Donor, LegislatorFinanceSummary
+from core.db_models.legislator import Legislator
+from core.seed import DEFAULT_COUNTS, TITLE_WORDS, scaled_counts, seed_database
+from user_routes.urls import urlpatterns
+
+# -----------------------------
+# API load benchmark
+# -----------------------------
+# Builds a synthetic database (core/seed.py) once, then sends every route in
+# user_routes/urls.py a batch of requests with randomized parameters from a
+# pool of threads and reports latency percentiles, throughput and queries
+# per request. By default requests go through the Django test client in
+# this process; --url sends them to a running server instead (start it with
+# DJANGO_DB_PATH pointing at the same database), and queries per request
+# then come from its Server-Timing header (user_routes/timing.py).
+
+TABLES = {
+    "legislator": Legislator,
+    "bill": Bill,
+    "bill_sponsor": BillSponsor,
+    "bill_subject": BillSubject,
+    "campaign": Campaign,
+    "donor": Donor,
+    "finance_summary": LegislatorFinanceSummary,
+}
+
+SERVER_TIMING_QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def _percentile(values, p):
+    # nearest rank on a sorted list
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))]
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _route_params(rng, legislators):
+    """Route name -> callable returning one request's GET params."""
+    ids = [bioguide_id for bioguide_id, _, _ in legislators]
+
+    def name():
+        _, first, last = rng.choice(legislators)
+        return rng.choice((last, f"{first} {last}", first))
+
+    def prefix():
+        _, _, last = rng.choice(legislators)
+        return last[:rng.randint(2, 5)]
+
+    def sponsored():
+        params = {"bioguide_id": rng.choice(ids)}
+        if rng.random() < 0.25:
+            params["keywords"] = rng.choice(TITLE_WORDS)
+        return params
+
+    return {
+        "search_legislator": lambda: {"q": name()},
+        "autocomplete_legislator": lambda: {"q": prefix()},
+        "get_legislator": lambda: {"bioguide_id": rng.choice(ids)},
+        "get_legislators": lambda: {"bioguide_ids": ",".join(rng.sample(ids, min(25, len(ids))))},
+        "get_sponsored_legislation": sponsored,
+        "get_donors": lambda: {"bioguide_id": rng.choice(ids)},
+        "get_totals": lambda: {"bioguide_id": rng.choice(ids)},
+        "get_finance_summary": lambda: {"bioguide_id": rng.choice(ids)},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic database and load test every user_routes endpoint, "
+        "reporting p50/p95/p99 latency, throughput and queries per request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database-name",
+            help="database to seed and read (default: loadbench.sqlite3 next to manage.py)",
+        )
+        parser.add_argument("--reseed", action="store_true", help="drop the synthetic data and generate it again")
+        parser.add_argument("--seed-only", action="store_true", help="build the database and exit")
+        parser.add_argument("--scale", type=float, default=1.0, help="multiplies every default row count")
+        for table, n in DEFAULT_COUNTS.items():
+            parser.add_argument(f"--{table}", type=int, help=f"rows to generate (default {n:,} x scale)")
+        parser.add_argument("--seed", type=int, default=0, help="random seed for data and request parameters")
+        parser.add_argument("--concurrency", type=int, default=8, help="requests in flight")
+        parser.add_argument("--requests", type=int, default=1000, help="measured requests per route")
+        parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per route first")
+        parser.add_argument("--routes", help="comma separated route names (default: all)")
+        parser.add_argument("--url", help="base url of a running server, e.g. http://127.0.0.1:8000")
+        parser.add_argument(
+            "--response-cache", action="store_true",
+            help="leave the API response cache on (in process runs turn it off so every request reaches the database)",
+        )
+        parser.add_argument("--output", help="also write the report to this JSON file")
+
+    def handle(self, *args, **options):
+        routes = [p.name for p in urlpatterns]
+        if options["routes"]:
+            selected = [r for r in options["routes"].split(",") if r]
+            unknown = set(selected) - set(routes)
+            if unknown:
+                raise CommandError(f"unknown routes: {', '.join(sorted(unknown))}")
+            routes = selected
+
+        database = self._use_database(options["database_name"], options["reseed"])
+        counts = self._ensure_seeded(options)
+        if options["seed_only"]:
+            return
+
+        rng = random.Random(options["seed"])
+        legislators = list(Legislator.objects.values_list("bioguide_id", "first_name", "last_name"))
+        params = _route_params(rng, legislators)
+        missing = set(routes) - set(params)
+        if missing:
+            raise CommandError(f"no request parameters defined for: {', '.join(sorted(missing))}")
+
+        report = {
+            "revision": _git_revision(),
+            "database": database,
+            "rows": counts,
+            "target": options["url"] or "in-process",
+            "concurrency": options["concurrency"],
+            "requests_per_route": options["requests"],
+            "response_cache": options["response_cache"] or bool(options["url"]),
+            "routes": {},
+        }
+
+        self.stdout.write(
+            f"{'route':<28} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+            f"{'queries':>8} {'errors':>7} {'cached':>7}"
+        )
+        with self._environment(options):
+            for name in routes:
+                path = reverse(name)
+                batch = [params[name]() for _ in range(options["warmup"] + options["requests"])]
+                self._drive(path, batch[:options["warmup"]], options)
+                result = self._drive(path, batch[options["warmup"]:], options)
+                report["routes"][name] = result
+                self.stdout.write(
+                    f"{name:<28} {result['throughput_rps']:>8.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                    f"{result['p99_ms']:>8.2f} {result['max_ms']:>8.2f} "
+                    f"{'-' if result['queries_per_request'] is None else result['queries_per_request']:>8} "
+                    f"{result['errors']:>7} {result['cache_hits']:>7}"
+                )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"wrote {options['output']}")
+
+    # -----------------------------
+    # Database
+    # -----------------------------
+
+    def _use_database(self, name, reseed):
+        # same switch create_test_db makes; every thread's connection reads
+        # this settings dict, so the worker threads follow it
+        sqlite = connection.vendor == "sqlite"
+        if not name:
+            name = str(settings.BASE_DIR / "loadbench.sqlite3") if sqlite else f"{connection.settings_dict['NAME']}_loadbench"
+
+        connection.close()
+        connection.settings_dict["NAME"] = name
+
+        if reseed:
+            if sqlite:
+                for suffix in ("", "-wal", "-shm"):
+                    if os.path.exists(name + suffix):
+                        os.remove(name + suffix)
+            else:
+                call_command("flush", interactive=False, verbosity=0)
+        call_command("migrate", interactive=False, verbosity=0)
+        return name
+
+    def _ensure_seeded(self, options):
+        if Legislator.objects.exists():
+            self.stdout.write("using the existing synthetic data (--reseed to generate it again)")
+        else:
+            counts = scaled_counts(options["scale"], **{table: options[table] for table in DEFAULT_COUNTS})
+            self.stdout.write("seeding " + ", ".join(f"{n:,} {table}" for table, n in counts.items()))
+
+            if connection.vendor == "sqlite":
+                with connection.cursor() as cursor:
+                    cursor.execute("PRAGMA synchronous = OFF")
+
+            start = time.perf_counter()
+
+            def progress(table, rows):
+                self.stdout.write(f"  {table:<16} {rows:>10,}  {time.perf_counter() - start:8.1f}s")
+
+            seed_database(counts, seed=options["seed"], progress=progress)
+            connection.close()
+
+        return {table: model.objects.count() for table, model in TABLES.items()}
+
+    # -----------------------------
+    # Load
+    # -----------------------------
+
+    @contextlib.contextmanager
+    def _environment(self, options):
+        if options["url"]:
+            yield
+            return
+
+        # the test client's "testserver" host has to be allowed
+        setup_test_environment()
+        try:
+            if options["response_cache"]:
+                yield
+            else:
+                with override_settings(
+                    CACHES={**settings.CACHES, "loadbench": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+                    API_RESPONSE_CACHE="loadbench",
+                ):
+                    yield
+        finally:
+            teardown_test_environment()
+
+    def _drive(self, path, batch, options):
+        if not batch:
+            return None
+
+        pending = iter(batch)
+        send = self._http_sender(options["url"], path) if options["url"] else self._client_sender(path)
+
+        def worker():
+            samples = []
+            request = send()
+            try:
+                # list iterators hand out each item once, even across threads
+                for params in pending:
+                    samples.append(request(params))
+            finally:
+                connection.close()
+            return samples
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            futures = [pool.submit(worker) for _ in range(options["concurrency"])]
+            samples = [sample for future in futures for sample in future.result()]
+        wall = time.perf_counter() - start
+
+        latencies = sorted(s[0] * 1000 for s in samples)
+        queries = [s[1] for s in samples if s[1] is not None]
+        return {
+            "requests": len(samples),
+            "errors": sum(1 for s in samples if s[2] >= 400),
+            "cache_hits": sum(1 for s in samples if s[3]),
+            "wall_s": round(wall, 3),
+            "throughput_rps": round(len(samples) / wall, 1),
+            "p50_ms": round(_percentile(latencies, 50), 2),
+            "p95_ms": round(_percentile(latencies, 95), 2),
+            "p99_ms": round(_percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2),
+            "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+            "max_queries": max(queries) if queries else None,
+        }
+
+    def _client_sender(self, path):
+        def send():
+            client = Client()
+
+            def request(params):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = client.get(path, params)
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                    elapsed = time.perf_counter() - start
+                return elapsed, len(queries), response.status_code, response.get("X-Cache") == "HIT"
+
+            return request
+
+        return send
+
+    def _http_sender(self, base_url, path):
+        import requests
+
+        url = base_url.rstrip("/") + path
+
+        def send():
+            session = requests.Session()
+
+            def request(params):
+                start = time.perf_counter()
+                response = session.get(url, params=params)
+                response.content
+                elapsed = time.perf_counter() - start
+                queries = SERVER_TIMING_QUERIES.search(response.headers.get("Server-Timing", ""))
+                return (
+                    elapsed,
+                    int(queries.group(1)) if queries else None,
+                    response.status_code,
+                    response.headers.get("X-Cache") == "HIT",
+                )
+
+            return request
+
+        return send
+
@@ -0,0 +1,127 @@
+from collections.abc import AsyncIterator, Iterator
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# -----------------------------
+# Incremental JSON encoding
+# -----------------------------
+# Builds the same document JsonResponse would, but lazily: any value that is
+# an iterator (e.g. rows from QuerySet.iterator()) is encoded as a JSON array
+# one item at a time, and any callable is only evaluated when the encoder
+# reaches it (useful for values that depend on the rows before it, such as a
+# pagination cursor). The a-prefixed variants also accept async iterators
+# (QuerySet.aiterator()) for the views in async_views.py.
+#
+# Under ASGI (uvicorn) Django reads a sync iterator to the end before sending
+# anything, so stream_json_response hands the sync views' chunks over as an
+# async iterator there, each one still produced in the thread the view ran in.
+
+CHUNK_BYTES = 16 * 1024
+
+_encoder = DjangoJSONEncoder()
+_END = object()
+
+
+def _iter_json(value):
+    if callable(value):
+        value = value()
+
+    if isinstance(value, dict):
+        yield "{"
+        for i, (key, item) in enumerate(value.items()):
+            yield (", " if i else "") + _encoder.encode(str(key)) + ": "
+            yield from _iter_json(item)
+        yield "}"
+    elif isinstance(value, Iterator):
+        yield "["
+        for i, item in enumerate(value):
+            if i:
+                yield ", "
+            yield from _iter_json(item)
+        yield "]"
+    else:
+        yield _encoder.encode(value)
+
+
+def _buffered(pieces):
+    buf = []
+    size = 0
+    for piece in pieces:
+        buf.append(piece)
+        size += len(piece)
+        if size >= CHUNK_BYTES:
+            yield "".join(buf).encode("utf-8")
+            buf = []
+            size = 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+async def _from_sync_thread(chunks):
+    # thread_sensitive: the thread sync views run in, which holds the
+    # connection QuerySet.iterator() reads from
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk(chunks, _END)) is not _END:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def stream_json_response(request, data):
+    chunks = _buffered(_iter_json(data))
+    if isinstance(request, ASGIRequest):
+        chunks = _from_sync_thread(chunks)
+    return StreamingHttpResponse(chunks, content_type="application/json")
+
+
+async def _aiter_json(value):
+    if callable(value):
+        value = value()
+
+    if isinstance(value, dict):
+        yield "{"
+        for i, (key, item) in enumerate(value.items()):
+            yield (", " if i else "") + _encoder.encode(str(key)) + ": "
+            async for piece in _aiter_json(item):
+                yield piece
+        yield "}"
+    elif isinstance(value, (AsyncIterator, Iterator)):
+        yield "["
+        i = 0
+        if isinstance(value, AsyncIterator):
+            async for item in value:
+                yield ", " if i else ""
+                async for piece in _aiter_json(item):
+                    yield piece
+                i += 1
+        else:
+            for item in value:
+                yield ", " if i else ""
+                async for piece in _aiter_json(item):
+                    yield piece
+                i += 1
+        yield "]"
+    else:
+        yield _encoder.encode(value)
+
+
+async def _abuffered(pieces):
+    buf = []
+    size = 0
+    async for piece in pieces:
+        buf.append(piece)
+        size += len(piece)
+        if size >= CHUNK_BYTES:
+            yield "".join(buf).encode("utf-8")
+            buf = []
+            size = 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def astream_json_response(data):
+    return StreamingHttpResponse(_abuffered(_aiter_json(data)), content_type="application/json")
@@ -17,4 +17,346 @@ os.environ.setdefault(
 load_dotenv()
 
 # 4. Initialize Django
-django.setup()
\ No newline at end of file
+django.setup()
+
+import json
+import logging
+import re
+import statistics
+import tempfile
+import threading
+import time
+import warnings
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core.db_models.legislator import Legislator
+from core.seed import seed_database
+from user_routes.autocomplete import LegislatorPrefixIndex, legislator_index
+from user_routes.urls import urlpatterns
+
+# -----------------------------
+# Performance gates
+# -----------------------------
+# Run on a small seeded dataset (core/seed.py). Activity there is skewed,
+# so the busiest legislator has many times the bills and donors of the
+# quietest one. Each endpoint must issue the same pinned number of queries
+# for both: a count that grows with the data is an N+1.
+
+FIXTURE_COUNTS = {
+    "legislators": 200,
+    "bills": 2_000,
+    "sponsors": 10_000,
+    "subjects": 4_000,
+    "campaigns": 1_000,
+    "donors": 20_000,
+}
+
+# queries per request, however much data the legislator has
+EXPECTED_QUERIES = {
+    "search_legislator": 2,          # FTS match, legislator rows
+    "autocomplete_legislator": 0,    # in-memory index, once built
+    "get_legislator": 1,
+    "get_legislators": 1,
+    "get_sponsored_legislation": 2,  # legislator, one page of bills
+    "get_donors": 3,                 # legislator, campaigns, ranked donors
+    "get_totals": 2,                 # legislator, campaigns
+    "get_finance_summary": 1,
+}
+
+# sequential requests on the fixture; generous, override on slow machines
+LATENCY_CEILING_MS = float(os.getenv("PERF_LATENCY_CEILING_MS", 500))
+
+# one log line per request would drown the test output; the timing tests
+# turn it back on with assertLogs
+logging.getLogger("user_routes.timing").setLevel(logging.WARNING)
+
+no_response_cache = override_settings(
+    CACHES={**settings.CACHES, "tests": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+    API_RESPONSE_CACHE="tests",
+)
+
+
+async def _consume(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+class SeededTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # writes to Legislator bump the dataset version; keep the real stamp alone
+        version_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(version_dir.cleanup)
+        override = override_settings(DATASET_VERSION_FILE=Path(version_dir.name) / "dataset.version")
+        override.enable()
+        cls.addClassCleanup(override.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_database(FIXTURE_COUNTS)
+
+        by_bills = Legislator.objects.annotate(n=Count("billsponsor")).order_by("n", "bioguide_id")
+        cls.quiet = by_bills.first()
+        cls.busy = by_bills.last()
+        by_donors = Legislator.objects.annotate(n=Count("campaign__donor")).order_by("n", "bioguide_id")
+        cls.few_donors = by_donors.first()
+        cls.many_donors = by_donors.last()
+        cls.bioguide_ids = list(Legislator.objects.order_by("bioguide_id").values_list("bioguide_id", flat=True))
+
+    def setUp(self):
+        # the index is process wide; rebuild it from this test's data
+        legislator_index.clear()
+
+    def get(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        # streamed bodies run their queries while being consumed
+        if response.streaming and response.is_async:
+            async_to_sync(_consume)(response.streaming_content)
+        elif response.streaming:
+            b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assertQueries(self, name, n=None, **params):
+        with self.assertNumQueries(EXPECTED_QUERIES[name] if n is None else n):
+            return self.get(name, **params)
+
+
+class FixtureTests(SeededTestCase):
+    def test_every_route_is_pinned(self):
+        self.assertEqual(set(EXPECTED_QUERIES), {p.name for p in urlpatterns})
+
+    def test_fixture_is_skewed(self):
+        # otherwise the busy/quiet comparisons below prove nothing
+        self.assertGreaterEqual(self.busy.n, 5 * max(self.quiet.n, 1))
+        self.assertGreaterEqual(self.many_donors.n, 5 * max(self.few_donors.n, 1))
+
+
+@no_response_cache
+class EndpointQueryCountTests(SeededTestCase):
+    def test_search_legislator(self):
+        for q in (self.busy.last_name, self.busy.full_name, self.busy.bioguide_id):
+            self.assertQueries("search_legislator", q=q, limit=100)
+        self.assertQueries("search_legislator", 0, q="")
+
+    def test_autocomplete_legislator(self):
+        self.assertQueries("autocomplete_legislator", 1, q="sm")  # builds the index
+        for q in ("s", "smi", self.busy.full_name):
+            self.assertQueries("autocomplete_legislator", q=q, limit=100)
+
+    def test_get_legislator(self):
+        for bioguide_id in (self.busy.bioguide_id, "X999999"):
+            self.assertQueries("get_legislator", bioguide_id=bioguide_id)
+
+    def test_get_legislators(self):
+        for ids in (self.bioguide_ids[:1], self.bioguide_ids[:100], [*self.bioguide_ids[:50], "X999999"]):
+            self.assertQueries("get_legislators", bioguide_ids=",".join(ids))
+
+    def test_get_sponsored_legislation(self):
+        for legislator in (self.quiet, self.busy):
+            self.assertQueries("get_sponsored_legislation", bioguide_id=legislator.bioguide_id, limit=100)
+            self.assertQueries("get_sponsored_legislation", bioguide_id=legislator.bioguide_id, keywords="health")
+            self.assertQueries("get_sponsored_legislation", bioguide_id=legislator.bioguide_id, stream=1, limit=5000)
+
+    def test_get_sponsored_legislation_later_pages(self):
+        response = self.assertQueries("get_sponsored_legislation", bioguide_id=self.busy.bioguide_id, limit=10)
+        cursor = response.json()["next_cursor"]
+        self.assertIsNotNone(cursor)
+        self.assertQueries("get_sponsored_legislation", bioguide_id=self.busy.bioguide_id, limit=10, cursor=cursor)
+
+    def test_get_donors(self):
+        for legislator in (self.few_donors, self.many_donors):
+            self.assertQueries("get_donors", bioguide_id=legislator.bioguide_id)
+            self.assertQueries("get_donors", bioguide_id=legislator.bioguide_id, limit=100)
+            self.assertQueries("get_donors", bioguide_id=legislator.bioguide_id, stream=1, limit=5000)
+
+    def test_get_totals(self):
+        for legislator in (self.few_donors, self.many_donors):
+            self.assertQueries("get_totals", bioguide_id=legislator.bioguide_id)
+            self.assertQueries("get_totals", bioguide_id=legislator.bioguide_id, stream=1)
+
+    def test_get_finance_summary(self):
+        for legislator in (self.few_donors, self.many_donors):
+            self.assertQueries("get_finance_summary", bioguide_id=legislator.bioguide_id)
+
+
+@override_settings(ROOT_URLCONF="user_routes.async_urls")
+class AsyncEndpointQueryCountTests(EndpointQueryCountTests):
+    """The same counts for async_views.py."""
+
+
+class ResponseCacheQueryCountTests(SeededTestCase):
+    def setUp(self):
+        super().setUp()
+        caches[settings.API_RESPONSE_CACHE].clear()
+
+    def test_repeated_request_skips_the_database(self):
+        params = {"bioguide_id": self.many_donors.bioguide_id}
+        self.assertQueries("get_donors", **params)
+        response = self.assertQueries("get_donors", 0, **params)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_error_replies_are_not_cached(self):
+        for name in ("get_legislator", "get_finance_summary"):
+            for _ in range(2):
+                response = self.assertQueries(name, 1, bioguide_id="NOBODY")
+                self.assertIn("error", response.json())
+                self.assertNotIn("ETag", response)
+                self.assertNotIn("X-Cache", response)
+
+    def test_matching_etag_skips_the_database(self):
+        params = {"bioguide_id": self.busy.bioguide_id}
+        etag = self.assertQueries("get_sponsored_legislation", **params)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("get_sponsored_legislation"), params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+@no_response_cache
+class EndpointLatencyTests(SeededTestCase):
+    REQUESTS = 20
+
+    def params(self, name, i):
+        busy = (self.busy, self.many_donors)[i % 2].bioguide_id
+        return {
+            "search_legislator": {"q": self.busy.last_name},
+            "autocomplete_legislator": {"q": self.busy.last_name[:2]},
+            "get_legislator": {"bioguide_id": busy},
+            "get_legislators": {"bioguide_ids": ",".join(self.bioguide_ids[:100])},
+            "get_sponsored_legislation": {"bioguide_id": busy, "limit": 100},
+            "get_donors": {"bioguide_id": busy, "limit": 100},
+            "get_totals": {"bioguide_id": busy},
+            "get_finance_summary": {"bioguide_id": busy},
+        }[name]
+
+    def test_p95_under_ceiling(self):
+        for name in EXPECTED_QUERIES:
+            with self.subTest(route=name):
+                timings = []
+                for i in range(self.REQUESTS):
+                    start = time.perf_counter()
+                    self.get(name, **self.params(name, i))
+                    timings.append((time.perf_counter() - start) * 1000)
+                p95 = statistics.quantiles(timings, n=20)[-1]
+                self.assertLess(p95, LATENCY_CEILING_MS, f"{name} p95 {p95:.1f} ms")
+
+
+@no_response_cache
+class ServerTimingTests(SeededTestCase):
+    def server_timing(self, response):
+        header = response["Server-Timing"]
+        metrics = dict(re.findall(r"(\w+);dur=([\d.]+)", header))
+        self.assertEqual(set(metrics), {"db", "serialize", "app", "total"})
+        return header, {name: float(value) for name, value in metrics.items()}
+
+    def test_header(self):
+        response = self.get("get_donors", bioguide_id=self.many_donors.bioguide_id, limit=100)
+        header, metrics = self.server_timing(response)
+        self.assertIn(f'desc="{EXPECTED_QUERIES["get_donors"]} queries"', header)
+        self.assertGreater(metrics["serialize"], 0)
+        self.assertLessEqual(metrics["db"] + metrics["serialize"], metrics["total"])
+
+    def test_log_line(self):
+        with self.assertLogs("user_routes.timing", "INFO") as logs:
+            self.get("search_legislator", q=self.busy.last_name)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["route"], "search_legislator")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["db_queries"], EXPECTED_QUERIES["search_legislator"])
+        self.assertFalse(record["streamed"])
+
+    def test_streamed_response_is_logged_after_the_body(self):
+        with self.assertLogs("user_routes.timing", "INFO") as logs:
+            self.get("get_donors", bioguide_id=self.many_donors.bioguide_id, stream=1, limit=5000)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertTrue(record["streamed"])
+        self.assertEqual(record["db_queries"], EXPECTED_QUERIES["get_donors"])
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled(self):
+        with self.assertNoLogs("user_routes.timing", "INFO"):
+            response = self.get("get_legislator", bioguide_id=self.busy.bioguide_id)
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    @override_settings(ROOT_URLCONF="user_routes.async_urls")
+    async def test_async_view(self):
+        response = await self.async_client.get(
+            reverse("get_donors"), {"bioguide_id": self.many_donors.bioguide_id},
+        )
+        self.assertEqual(response.status_code, 200)
+        header, _ = self.server_timing(response)
+        self.assertIn(f'desc="{EXPECTED_QUERIES["get_donors"]} queries"', header)
+
+
+class AsgiStreamingTests(SeededTestCase):
+    """The sync views' stream mode served over ASGI, as uvicorn does with DJANGO_ASYNC_VIEWS=false."""
+
+    async def test_chunks_are_sent_as_they_are_encoded(self):
+        routes = {
+            "get_sponsored_legislation": {"bioguide_id": self.busy.bioguide_id, "limit": 5},
+            "get_donors": {"bioguide_id": self.many_donors.bioguide_id},
+            "get_totals": {"bioguide_id": self.many_donors.bioguide_id},
+        }
+        for name, params in routes.items():
+            with self.subTest(route=name), warnings.catch_warnings():
+                # Django warns when it reads a sync iterator to the end first
+                warnings.simplefilter("error")
+                response = await self.async_client.get(reverse(name), {**params, "stream": 1})
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.is_async)
+                body = json.loads(await _consume(response.streaming_content))
+                if name == "get_sponsored_legislation":
+                    self.assertEqual(len(body["results"]), 5)
+                    self.assertIsNotNone(body["next_cursor"])
+                else:
+                    self.assertTrue(body["campaigns"])
+
+
+class LegislatorPrefixIndexTests(SimpleTestCase):
+    @staticmethod
+    def rows(n, last_name):
+        return [
+            {
+                "bioguide_id": f"S{i:06d}", "full_name": f"Jo {last_name}", "first_name": "Jo",
+                "last_name": last_name, "current_member": i % 2 == 0, "current_party": "d", "state": "ca",
+                "district": 1, "current_chamber": "House", "image_link": None,
+            }
+            for i in range(n)
+        ]
+
+    def test_search_during_rebuilds(self):
+        # rebuilds alternate between a large and a small dataset; a reader
+        # mixing one build's keys with another's rows would index past the
+        # end of the rows or return names from neither
+        index = LegislatorPrefixIndex()
+        large, small = self.rows(400, "Smith"), self.rows(3, "Smithers")
+        index.build(large, "1")
+        errors = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                try:
+                    results = index.search("smith", limit=500)
+                    if len({r["last_name"] for r in results}) != 1:
+                        errors.append(f"mixed results: {len(results)}")
+                except Exception as e:
+                    errors.append(repr(e))
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for i in range(300):
+            index.build(small if i % 2 else large, str(i))
+        done.set()
+        for reader in readers:
+            reader.join()
+
+        self.assertEqual(errors, [])
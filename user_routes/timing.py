@@ -0,0 +1,206 @@
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+# -----------------------------
+# Per-request timing
+# -----------------------------
+# ServerTimingMiddleware times a sample of requests (SERVER_TIMING_SAMPLE_RATE)
+# and reports each one twice: as a Server-Timing header, which browsers show
+# in the network panel and `manage.py loadbench --url` reads, and as one
+# JSON line on the "user_routes.timing" logger.
+#
+#   db         time spent in cursor.execute() and the number of queries
+#   serialize  time spent in measure("serialize") blocks, i.e. building the
+#              response dicts and encoding the JSON
+#   app        everything else: parsing, fetching rows, model instances, ...
+#   total      the whole request, including the middleware below this one
+#
+# The request being timed is held in a context variable, so queries are
+# counted on whichever thread runs them, including the sync_to_async
+# threads the async views use. For streamed responses the header can only
+# cover the time until the response is returned; the log line is written
+# once the body has been sent and covers all of it.
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_timing", default=None)
+_END = object()
+
+
+class RequestTiming:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.spans = {}
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def metrics(self):
+        """Milliseconds per metric so far."""
+        total = time.perf_counter() - self.start
+        serialize = self.spans.get("serialize", 0.0)
+        return {
+            "total_ms": round(total * 1000, 2),
+            "db_ms": round(self.db * 1000, 2),
+            "db_queries": self.queries,
+            "serialize_ms": round(serialize * 1000, 2),
+            "app_ms": round(max(total - self.db - serialize, 0.0) * 1000, 2),
+        }
+
+    def header(self):
+        m = self.metrics()
+        return (
+            f'db;dur={m["db_ms"]};desc="{m["db_queries"]} queries", '
+            f'serialize;dur={m["serialize_ms"]}, app;dur={m["app_ms"]}, total;dur={m["total_ms"]}'
+        )
+
+
+@contextmanager
+def measure(name):
+    """Adds the block's time to metric `name` of the request being timed, if any."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - start)
+
+
+def _record_query(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db += time.perf_counter() - start
+        timing.queries += 1
+
+
+def _install(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install, dispatch_uid="request_timing")
+
+
+def _sampled():
+    rate = settings.SERVER_TIMING_SAMPLE_RATE
+    return rate >= 1 or random.random() < rate
+
+
+def _log(request, response, timing):
+    match = getattr(request, "resolver_match", None)
+    record = {
+        "method": request.method,
+        "path": request.path,
+        "route": match.url_name if match else None,
+        "status": response.status_code,
+        **timing.metrics(),
+        "cache": response.get("X-Cache"),
+        "streamed": response.streaming,
+    }
+    logger.info(json.dumps(record), extra={"request_timing": record})
+
+
+def _timed_stream(content, timing, done):
+    # each chunk is produced after the middleware returned, so the timing
+    # has to be current again while it is
+    chunks = iter(content)
+    try:
+        while True:
+            token = _current.set(timing)
+            try:
+                chunk = next(chunks, _END)
+            finally:
+                _current.reset(token)
+            if chunk is _END:
+                break
+            yield chunk
+    finally:
+        done()
+
+
+async def _atimed_stream(content, timing, done):
+    chunks = aiter(content)
+    try:
+        while True:
+            token = _current.set(timing)
+            try:
+                chunk = await anext(chunks, _END)
+            finally:
+                _current.reset(token)
+            if chunk is _END:
+                break
+            yield chunk
+    finally:
+        done()
+
+
+class ServerTimingMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not _sampled():
+            return self.get_response(request)
+
+        # this thread's connection may predate connection_created's hook
+        _install(connection)
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timing)
+
+    async def __acall__(self, request):
+        if not _sampled():
+            return await self.get_response(request)
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timing)
+
+    def _finish(self, request, response, timing):
+        response["Server-Timing"] = timing.header()
+        if not response.streaming:
+            _log(request, response, timing)
+            return response
+
+        def done():
+            _log(request, response, timing)
+
+        if response.is_async:
+            response.streaming_content = _atimed_stream(response.streaming_content, timing, done)
+        else:
+            response.streaming_content = _timed_stream(response.streaming_content, timing, done)
+        return response
@@ -1,14 +1,33 @@
 from typing import Tuple
 from django.apps import apps
 from django.conf import settings
+from django.db import connection
 from django.db.models import Q
 from django.http import JsonResponse
 from django.views.decorators.http import require_GET
+import base64
+import binascii
+import datetime
 import json
+from itertools import chain
 from core.db_models.legislator import Legislator
-from core.db_models.bill import Bill, BillSponsor
-from core.db_models.campaign import Campaign, Donor
-from django.db.models import Q, Case, When, Value, IntegerField
+from core.db_models.bill import Bill, BillSponsor, BillSubject
+from core.db_models.campaign import Campaign, Donor, LegislatorFinanceSummary, MONEY_FIELDS
+from core.fts import BILL_FTS_TABLE, LEGISLATOR_FTS_TABLE, build_match, build_phrase_match, fts_enabled, tokenize
+from user_routes.autocomplete import legislator_index
+from user_routes.cache import cached_response
+from user_routes.streaming import stream_json_response
+from user_routes.timing import measure
+from django.db.models import Q, Case, Exists, F, OuterRef, When, Value, IntegerField, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+
+DEFAULT_LIMIT = 25
+MAX_LIMIT = 100
+AUTOCOMPLETE_LIMIT = 10
+MAX_BATCH_SIZE = 100
+STREAM_MAX_LIMIT = 5000
+STREAM_CHUNK_SIZE = 500
 
 
 # -----------------------------
@@ -55,39 +74,81 @@ def _serialize_donor(d: Donor):
         "contribution_receipt_date": d.contribution_receipt_date.isoformat() if d.contribution_receipt_date else None,
     }
 
+def _serialize_finance_summary(s: LegislatorFinanceSummary):
+    return {
+        "bioguide_id": s.legislator_id,
+        **{field: getattr(s, field) for field in MONEY_FIELDS},
+        "latest_cycle": s.latest_cycle,
+        "campaign_count": s.campaign_count,
+        "donor_count": s.donor_count,
+        "top_donor": {
+            "source_name": s.top_donor_name,
+            "contribution_receipt_amount": s.top_donor_amount,
+        } if s.top_donor_amount is not None else None,
+        "updated_at": s.updated_at.isoformat(),
+    }
+
 # -----------------------------
 # Helpers
 # -----------------------------
 
-def _get_donors(campaign, limit):
-    donors = Donor.objects.filter(campaign=campaign)
+def _ranked_donors(campaigns, limit):
+    """
+    Top `limit` donors per campaign by contribution_receipt_amount, as one
+    query with a ROW_NUMBER() window, ordered by campaign then rank.
+    """
+    return (
+        Donor.objects
+        .filter(campaign__in=campaigns)
+        .annotate(
+            donor_rank=Window(
+                expression=RowNumber(),
+                partition_by=F("campaign_id"),
+                order_by=(F("contribution_receipt_amount").desc(), F("id").asc()),
+            )
+        )
+        .filter(donor_rank__lte=limit)
+        .order_by("campaign_id", "donor_rank")
+    )
 
-    if not donors.exists():
-        return Donor.objects.none()
-    
-    return donors
+def _get_donors(campaigns, limit):
+    """Returns {campaign_id: [Donor, ...]} for _ranked_donors."""
+    by_campaign = {}
+    for donor in _ranked_donors(campaigns, limit):
+        by_campaign.setdefault(donor.campaign_id, []).append(donor)
+    return by_campaign
 
 
 
 def _get_legislator(bioguide_id):
 
-    result = Legislator.objects.filter(bioguide_id=bioguide_id)
+    legislator = Legislator.objects.filter(bioguide_id=bioguide_id).first()
 
-    if not result.exists():
+    if legislator is None:
         return None, JsonResponse({"result": {}, "error": "bioguide_id does not exist"})
 
-    return result.first(), None
-
-def _get_campaigns(bioguide_id):
+    return legislator, None
 
+def _get_campaigns(bioguide_id, stream=False):
+    """
+    The legislator's campaigns in id order, or with stream an iterator
+    reading them from a cursor. Returns (campaigns, error_response).
+    """
     legislator,err = _get_legislator(bioguide_id)
 
     if err:
-        return None, JsonResponse({"result": {"campaigns":[]}, "error":err["error"]})
+        return None, JsonResponse({"result": {"campaigns":[]}, "error": "bioguide_id does not exist"})
     
-    campaigns = Campaign.objects.filter(legislator=legislator)
+    campaigns = Campaign.objects.filter(legislator=legislator).order_by("id")
+
+    if stream:
+        rows = campaigns.iterator(chunk_size=STREAM_CHUNK_SIZE)
+        first = next(rows, None)
+        campaigns = None if first is None else chain([first], rows)
+    else:
+        campaigns = list(campaigns)
 
-    if not campaigns.exists():
+    if not campaigns:
         return None, JsonResponse({"result": {"campaigns":[]}, "error": "no campaigns exist for legislature:"+bioguide_id})
 
     return campaigns, None
@@ -98,6 +159,9 @@ def _load_body(request):
     If parsing succeeds: (dict, None)
     If it fails: (None, JsonResponse)
     """
+    if not request.body:
+        return {}, None
+
     try:
         data = json.loads(request.body.decode("utf-8"))
     except json.JSONDecodeError:
@@ -108,7 +172,163 @@ def _load_body(request):
 
     return data, None
 
-def _search_legislator_simple(query: str, limit: int = 25):
+def _wants_stream(request):
+    return (request.GET.get("stream") or "").lower() in ("1", "true")
+
+def _get_limit(request, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    try:
+        limit = int(request.GET.get("limit") or default)
+    except ValueError:
+        return default
+    return max(1, min(limit, maximum))
+
+def _encode_cursor(introduction_date, pk):
+    raw = f"{introduction_date.isoformat()}|{pk}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor):
+    """
+    Returns ((introduction_date, id), error_response).
+    An empty cursor means the first page: (None, None).
+    """
+    if not cursor:
+        return None, None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        date_part, pk_part = raw.split("|")
+        return (datetime.date.fromisoformat(date_part), int(pk_part)), None
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None, JsonResponse({"results": [], "error": "Invalid cursor"}, status=400)
+
+def _stream_campaign_donors(campaigns, donors):
+    """
+    Merges campaigns (ordered by id) with a donor iterator ordered by
+    campaign_id, yielding each campaign with a lazy "donors" array.
+    """
+    donors = iter(donors)
+    pending = next(donors, None)
+
+    for campaign in campaigns:
+        def campaign_donors(campaign_id=campaign.id):
+            nonlocal pending
+            while pending is not None and pending.campaign_id == campaign_id:
+                yield _serialize_donor(pending)
+                pending = next(donors, None)
+
+        campaign_obj = _serialize_campaign(campaign)
+        campaign_obj["donors"] = campaign_donors()
+        yield campaign_obj
+
+def _get_keywords(request, data):
+    """
+    Keywords from the JSON body ({"keywords": [...]}) and/or repeated
+    ?keywords= params. Returns (keywords, error_response).
+    """
+    keywords = data.get("keywords", [])
+    if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+        return None, JsonResponse({"error": "keywords must be a list of strings"}, status=400)
+
+    keywords = keywords + request.GET.getlist("keywords")
+    return [k.strip() for k in keywords if k.strip()], None
+
+def _filter_bills_by_keywords(bills, keywords):
+    """
+    Bills matching any keyword in their title, short summary or subjects.
+    On SQLite this is a single lookup against core_bill_fts.
+    """
+    if fts_enabled():
+        match = build_phrase_match(keywords)
+        if not match:
+            return bills.none()
+        return bills.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {BILL_FTS_TABLE} WHERE {BILL_FTS_TABLE} MATCH %s",
+            [match],
+        ))
+
+    cond = Q()
+    for keyword in keywords:
+        cond |= (
+            Q(title__icontains=keyword) |
+            Q(short_summary__icontains=keyword) |
+            Exists(BillSubject.objects.filter(bill=OuterRef("pk"), political_subject__iexact=keyword))
+        )
+    return bills.filter(cond)
+
+def _get_bioguide_ids(request):
+    """
+    Deduplicated ?bioguide_ids= values (comma separated and/or repeated).
+    Returns (bioguide_ids, error_response).
+    """
+    bioguide_ids = []
+    for value in request.GET.getlist("bioguide_ids"):
+        for bioguide_id in value.split(","):
+            bioguide_id = bioguide_id.strip()
+            if bioguide_id and bioguide_id not in bioguide_ids:
+                bioguide_ids.append(bioguide_id)
+
+    if not bioguide_ids:
+        return None, JsonResponse({"results": [], "error": "bioguide_ids is required"}, status=400)
+
+    if len(bioguide_ids) > MAX_BATCH_SIZE:
+        return None, JsonResponse(
+            {"results": [], "error": f"at most {MAX_BATCH_SIZE} bioguide_ids per request"},
+            status=400,
+        )
+
+    return bioguide_ids, None
+
+def _batch_results(bioguide_ids, found):
+    results = []
+    for bioguide_id in bioguide_ids:
+        legislator = found.get(bioguide_id)
+        if legislator is None:
+            results.append({"bioguide_id": bioguide_id, "result": {}, "error": "bioguide_id does not exist"})
+        else:
+            results.append({"bioguide_id": bioguide_id, "result": _serialize_legislator(legislator)})
+    return results
+
+def _sponsored_bills(legislator, keywords, after, limit):
+    """
+    One keyset page of a legislator's bills, newest first, as .values().
+    Fetches limit + 1 rows so the caller can tell whether there is a next page.
+    """
+    # (bill, legislator) is unique on BillSponsor, so the join cannot
+    # produce duplicates and needs no DISTINCT
+    bills = Bill.objects.filter(billsponsor__legislator=legislator)
+
+    if keywords:
+        bills = _filter_bills_by_keywords(bills, keywords)
+
+    if after:
+        after_date, after_id = after
+        bills = bills.filter(
+            Q(introduction_date__lt=after_date) |
+            Q(introduction_date=after_date, id__lt=after_id)
+        )
+
+    return bills.order_by("-introduction_date", "-id").values()[:limit + 1]
+
+def _split_page(bills, limit):
+    """Returns (page, next_cursor) for the limit + 1 rows of _sponsored_bills."""
+    if len(bills) <= limit:
+        return bills, None
+    bills = bills[:limit]
+    return bills, _encode_cursor(bills[-1]["introduction_date"], bills[-1]["id"])
+
+def _search_rank(q):
+    # lightweight ranking: exact > startswith > contains (using whole query)
+    return Case(
+        When(full_name__iexact=q, then=Value(0)),
+        When(last_name__iexact=q, then=Value(1)),
+        When(first_name__iexact=q, then=Value(2)),
+        When(full_name__istartswith=q, then=Value(3)),
+        When(last_name__istartswith=q, then=Value(4)),
+        When(first_name__istartswith=q, then=Value(5)),
+        default=Value(9),
+        output_field=IntegerField(),
+    )
+
+def _search_legislator_simple(query: str, limit: int = DEFAULT_LIMIT):
     q = (query or "").strip()
     if not q:
         return Legislator.objects.none()
@@ -124,46 +344,97 @@ def _search_legislator_simple(query: str, limit: int = 25):
             Q(full_name__icontains=t)
         )
 
-    # lightweight ranking: exact > startswith > contains (using whole query)
     return (
         Legislator.objects
         .filter(cond | Q(bioguide_id__iexact=q))
-        .annotate(
-            rank=Case(
-                When(full_name__iexact=q, then=Value(0)),
-                When(last_name__iexact=q, then=Value(1)),
-                When(first_name__iexact=q, then=Value(2)),
-                When(full_name__istartswith=q, then=Value(3)),
-                When(last_name__istartswith=q, then=Value(4)),
-                When(first_name__istartswith=q, then=Value(5)),
-                default=Value(9),
-                output_field=IntegerField(),
-            )
-        )
+        .annotate(rank=_search_rank(q))
         .order_by("rank", "last_name", "first_name")[:limit]
     )
 
+def _search_legislator_fts(query: str, limit: int = DEFAULT_LIMIT):
+    """
+    Index-backed search over core_legislator_fts (see core/migrations/0005).
+
+    Candidates come from the FTS5 index ordered by bm25 (full name and
+    bioguide_id weighted highest); the exact/startswith rank from the simple
+    search is then applied on top so exact name hits still come first.
+    """
+    q = (query or "").strip()
+    match = build_match(tokenize(q))
+    if not match:
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT bioguide_id FROM {LEGISLATOR_FTS_TABLE} "
+            f"WHERE {LEGISLATOR_FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({LEGISLATOR_FTS_TABLE}, 10.0, 2.0, 3.0, 5.0) "
+            "LIMIT %s",
+            [match, limit],
+        )
+        order = {row[0]: i for i, row in enumerate(cursor.fetchall())}
+
+    if not order:
+        return []
+
+    results = list(
+        Legislator.objects
+        .filter(bioguide_id__in=order.keys())
+        .annotate(rank=_search_rank(q))
+        .values()
+    )
+    results.sort(key=lambda r: (r["rank"], order[r["bioguide_id"]]))
+    return results
+
+def _search_legislator(query: str, limit: int = DEFAULT_LIMIT):
+    if fts_enabled():
+        return _search_legislator_fts(query, limit)
+    return list(_search_legislator_simple(query, limit).values())
+
 # -----------------------------
 # Views
 # -----------------------------
 @require_GET
+@cached_response
 def search_legislator(request):
     """
-    SQLite-safe search.
+    Full-text search (FTS5 on SQLite, icontains fallback elsewhere).
 
     GET params:
       - q : search string by partial name or exact bioguide_id
-      - limit: optional limits results length
+      - limit: optional limits results length (default 25, max 100)
     """
     q = request.GET.get("q") or ""
-    limit = request.GET.get("limit") or None
+    limit = _get_limit(request)
 
-    results = list(_search_legislator_simple(query=q, limit=limit).values())
+    results = _search_legislator(query=q, limit=limit)
 
-    return JsonResponse({"query": q, "results": results})
+    with measure("serialize"):
+        return JsonResponse({"query": q, "results": results})
 
 
 @require_GET
+@cached_response
+def autocomplete_legislator(request):
+    """
+    Keystroke-level name lookup served from an in-memory prefix index.
+
+    GET params:
+      - q : name prefix(es) or bioguide_id prefix
+      - limit: optional limits results length (default 10, max 100)
+    """
+    q = request.GET.get("q") or ""
+    limit = _get_limit(request, default=AUTOCOMPLETE_LIMIT)
+
+    legislator_index.ensure_current()
+    results = legislator_index.search(q, limit=limit)
+
+    with measure("serialize"):
+        return JsonResponse({"query": q, "results": results})
+
+
+@require_GET
+@cached_response
 def get_legislator(request):
     """
     GET params:
@@ -176,102 +447,181 @@ def get_legislator(request):
     if err:
         return err
 
-    return JsonResponse({"result": _serialize_legislator(legislator)})
+    with measure("serialize"):
+        return JsonResponse({"result": _serialize_legislator(legislator)})
 
 
 @require_GET
+@cached_response
+def get_legislators(request):
+    """
+    Batch version of get_legislator, answered from a single IN query.
+
+    GET params:
+      - bioguide_ids: comma separated and/or repeated (max 100 per request)
+    """
+    bioguide_ids, err = _get_bioguide_ids(request)
+    if err:
+        return err
+
+    found = Legislator.objects.in_bulk(bioguide_ids)
+
+    with measure("serialize"):
+        return JsonResponse({"results": _batch_results(bioguide_ids, found)})
+
+
+@require_GET
+@cached_response
 def get_sponsored_legislation(request):
     """
     GET params:
       - bioguide_id OR id (required)
-      - limit (optional, default 25)
-    
+      - limit (optional, default 25, max 100)
+      - cursor (optional): next_cursor from the previous page
+      - stream (optional): 1 to stream the page (limit max 5000)
+      - keywords (optional, repeatable): same as the body param
+
     BODY params:
-      - keywords (optional filter)
+      - keywords (optional filter): list of phrases; a bill matches if any
+        phrase appears in its title, short summary or subjects
+
+    Keyset paginated, newest first by (introduction_date, id), so every page
+    costs the same as the first one.
     """
     bioguide_id = request.GET.get("bioguide_id") or ""
-    limit = request.GET.get("limit") or 25
+    stream = _wants_stream(request)
+    limit = _get_limit(request, maximum=STREAM_MAX_LIMIT if stream else MAX_LIMIT)
+
+    after, err = _decode_cursor(request.GET.get("cursor"))
+    if err:
+        return err
 
     data, err = _load_body(request)
     if err:
         return err
-    
-    if "keywords" in data:
-        #TODO use some kind of ml model to match bills with sim keywords
-        for keyword in data["keywords"]:
-            #check if any keywords in bill match keyword in keyword
-            
-            pass
+
+    keywords, err = _get_keywords(request, data)
+    if err:
+        return err
     
     legislator, err = _get_legislator(bioguide_id)
-    # get sponsored bills now
-    sponsors = BillSponsor.objects.filter(legislator=legislator).select_related("bill")
-    bills = Bill.objects.filter(billsponsor__in=sponsors).distinct()
-    bills = list(bills.values())
+    if err:
+        return err
+
+    bills = _sponsored_bills(legislator, keywords, after, limit)
+
+    if stream:
+        page = {"next_cursor": None}
+
+        def rows():
+            for i, bill in enumerate(bills.iterator(chunk_size=STREAM_CHUNK_SIZE)):
+                if i == limit:
+                    page["next_cursor"] = _encode_cursor(last["introduction_date"], last["id"])
+                    break
+                last = bill
+                yield bill
+
+        return stream_json_response(request, {
+            "bioguide_id": bioguide_id,
+            "results": rows(),
+            "next_cursor": lambda: page["next_cursor"],
+        })
+
+    bills, next_cursor = _split_page(list(bills), limit)
 
-    return JsonResponse({"bioguide_id": bioguide_id, "results": bills})
+    with measure("serialize"):
+        return JsonResponse({"bioguide_id": bioguide_id, "results": bills, "next_cursor": next_cursor})
 
 
 @require_GET
+@cached_response
 def get_donors(request):
     """
     GET params:
       - bioguide_id OR id (required)
-      - limit (optional, default 25)
+      - limit (optional, default 25, max 100): top donors per campaign
+      - stream (optional): 1 to stream donors from a cursor (limit max 5000)
 
-    NOTE: This depends on your schema. This tries to find a Donor-like model automatically.
+    Runs a fixed three queries (legislator, campaigns, ranked donors)
+    regardless of how many campaigns the legislator has.
     """
     bioguide_id = request.GET.get('bioguide_id') or ""
-    limit = request.GET.get('limit') or 25
+    stream = _wants_stream(request)
+    limit = _get_limit(request, maximum=STREAM_MAX_LIMIT if stream else MAX_LIMIT)
 
     campaigns,err = _get_campaigns(bioguide_id)
 
     if err:
         return err
 
-    result_obj = {'campaigns':[]}
+    if stream:
+        donors = _ranked_donors(campaigns, limit).iterator(chunk_size=STREAM_CHUNK_SIZE)
+        return stream_json_response(request, {'campaigns': _stream_campaign_donors(campaigns, donors)})
 
-    for campaign in campaigns:
-        campaign_obj = _serialize_campaign(campaign)
+    donors_by_campaign = _get_donors(campaigns, limit)
+
+    with measure("serialize"):
+        result_obj = {'campaigns':[]}
+
+        for campaign in campaigns:
+            campaign_obj = _serialize_campaign(campaign)
 
-        donors = _get_donors(campaign, limit)
+            donors = donors_by_campaign.get(campaign.id, [])
 
-        campaign_obj['donors'] = [_serialize_donor(d) for d in donors]
+            campaign_obj['donors'] = [_serialize_donor(d) for d in donors]
 
-        result_obj['campaigns'].append(campaign_obj)
+            result_obj['campaigns'].append(campaign_obj)
 
-    return JsonResponse(result_obj)
+        return JsonResponse(result_obj)
 
 @require_GET
+@cached_response
 def get_totals(request):
     """
     GET params:
       - bioguide_id OR id (required)
+      - stream (optional): 1 to stream campaigns from a cursor
 
     NOTE: This depends on your schema. This tries to find a Total-like model automatically.
     """
     bioguide_id = request.GET.get("bioguide_id") or ""
-    limit = request.GET.get("limit") or 25
+    stream = _wants_stream(request)
 
-    # data, err = _load_body(request)
-    # if err:
-    #     return err
-    
-    # if "keywords" in data:
-    #     pass
-    
-    legislator, err = _get_legislator(bioguide_id)
-
-    campaigns,err = _get_campaigns(bioguide_id)
+    campaigns,err = _get_campaigns(bioguide_id, stream=stream)
 
     if err:
         return err
 
-    result_obj = {'campaigns':[]}
+    if stream:
+        return stream_json_response(request, {'campaigns': (_serialize_campaign(c) for c in campaigns)})
 
-    for campaign in campaigns:
-        campaign_obj = _serialize_campaign(campaign)
+    with measure("serialize"):
+        result_obj = {'campaigns':[]}
+
+        for campaign in campaigns:
+            campaign_obj = _serialize_campaign(campaign)
+
+            result_obj['campaigns'].append(campaign_obj)
+
+        return JsonResponse(result_obj)
+
+
+@require_GET
+@cached_response
+def get_finance_summary(request):
+    """
+    GET params:
+      - bioguide_id OR id (required)
+
+    Career totals precomputed by updater_service (LegislatorFinanceSummary),
+    served from a single row.
+    """
+    bioguide_id = request.GET.get("bioguide_id") or ""
+
+    summary = LegislatorFinanceSummary.objects.filter(legislator_id=bioguide_id).first()
 
-        result_obj['campaigns'].append(campaign_obj)
+    if summary is None:
+        return JsonResponse({"result": {}, "error": "no finance summary exists for legislature:"+bioguide_id})
 
-    return JsonResponse(result_obj)
\ No newline at end of file
+    with measure("serialize"):
+        return JsonResponse({"result": _serialize_finance_summary(summary)})